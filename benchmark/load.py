@@ -0,0 +1,40 @@
+"""
+Loading benchmark: the 10-handed all-in hands of the side pot benchmark,
+serialized then loaded back with HandHistory.from_dict.
+
+Run from the root of the repository:
+
+    python -m benchmark.load
+"""
+
+import logging
+import timeit
+
+from hh_creator.core.hh import HandHistory
+
+from .side_pots import N_HANDS, hands, report
+
+
+def main():
+    logging.disable(logging.WARNING)
+    dicts = [hh.to_dict() for hh in hands()]
+    n_actions = len(dicts[0]["actions"])
+    print(f"{N_HANDS} 10-handed hands, {n_actions} actions each\n")
+
+    n = 20
+    report(
+        "from_dict()",
+        timeit.timeit(lambda: [HandHistory.from_dict(d) for d in dicts], number=n),
+        n * N_HANDS,
+    )
+    report(
+        "from_dict(trusted=True)",
+        timeit.timeit(
+            lambda: [HandHistory.from_dict(d, trusted=True) for d in dicts], number=n
+        ),
+        n * N_HANDS,
+    )
+
+
+if __name__ == "__main__":
+    main()
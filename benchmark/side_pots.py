@@ -0,0 +1,148 @@
+"""
+Side pot benchmark: 10-handed hands where everybody goes all-in, each player
+having a different stack size.
+
+Compares the sweep-line SidePotLedger with the previous implementation, which
+peeled off the minimum investment in a loop, rebuilt from scratch every call.
+
+Run from the root of the repository:
+
+    python -m benchmark.side_pots
+"""
+
+import logging
+import timeit
+from decimal import Decimal
+
+from hh_creator.core.hh import ActionType, HandHistory, Position, SidePot, SidePotPlayer
+
+N_HANDS = 50
+
+
+def all_in_hand(stacks, n_folds=0):
+    hh = HandHistory(
+        stacks=[Decimal(s) for s in stacks],
+        small_blind=Decimal("0.5"),
+        big_blind=Decimal(1),
+    )
+    hh.post_blinds_and_antes()
+    while hh.current_player is not None:
+        possible = hh.possible_action_types()
+        to_call = hh.current_player_amount_to_call()
+        shove = hh.current_player.stack - to_call
+        if n_folds and to_call:
+            n_folds -= 1
+            hh.add_action(ActionType.FOLD)
+        elif ActionType.RAISE in possible and shove >= hh.minimum_raise():
+            hh.add_action(ActionType.RAISE, shove)
+        elif ActionType.CALL in possible:
+            hh.add_action(ActionType.CALL)
+        else:
+            hh.add_action(ActionType.CHECK)
+    return hh
+
+
+def hands():
+    # SB and BB are deep, then each seat shoves over the previous one
+    shoves = [95, 100, 10, 20, 30, 40, 50, 60, 70, 80]
+    return [all_in_hand([s + i for s in shoves], n_folds=i % 3) for i in range(N_HANDS)]
+
+
+def legacy_side_pots(hh):
+    side_players = [
+        SidePotPlayer(p.position, p.invested_in_pot())
+        for p in hh.players
+        if not p.has_folded()
+    ]
+    dead_players = [
+        SidePotPlayer(p.position, p.invested_in_pot())
+        for p in hh.players
+        if p.invested_in_pot() > 0 and p.has_folded()
+    ]
+    side_pots = []
+    while side_players:
+        min_ = min([p.investment for p in side_players])
+        pot = Decimal(0)
+        for p in side_players:
+            if p.position == Position.BB and hh.bb_ante:
+                p.investment -= hh.bb_ante
+                pot += hh.bb_ante
+            p.investment -= min_
+            pot += min_
+        dead_amounts = []
+        for p in dead_players:
+            removed = min(min_, p.investment)
+            dead_amounts.append(SidePotPlayer(p.position, removed, False))
+            p.investment -= removed
+            pot += removed
+        side_pots.append(
+            SidePot(
+                players=[SidePotPlayer(p.position, min_, True) for p in side_players],
+                amount=pot,
+                folded=dead_amounts,
+            )
+        )
+        dead_players = [p for p in dead_players if p.investment > 0]
+        side_players = [p for p in side_players if p.investment > 0]
+    return side_pots
+
+
+def every_cursor(hh):
+    return [
+        hh.at_action(cursor)
+        for cursor in range(-1, len(hh.editable_actions()) + 1)
+        for _ in range(2)
+    ]
+
+
+def report(name, seconds, n):
+    print(f"{name:<45} {seconds / n * 1e6:10.1f} µs")
+
+
+def main():
+    logging.disable(logging.WARNING)
+    all_hands = hands()
+    n_pots = len(all_hands[0].side_pots())
+    print(f"{N_HANDS} 10-handed hands, {n_pots} side pots each\n")
+
+    n = 20
+    report(
+        "build hand (add_action)",
+        timeit.timeit(hands, number=n),
+        n * N_HANDS,
+    )
+
+    n = 2000
+    report(
+        "side_pots(), legacy",
+        timeit.timeit(lambda: [legacy_side_pots(h) for h in all_hands], number=n),
+        n * N_HANDS,
+    )
+    report(
+        "side_pots(), sweep-line, recomputed",
+        timeit.timeit(lambda: [h._pots._sweep() for h in all_hands], number=n),
+        n * N_HANDS,
+    )
+    report(
+        "side_pots(), sweep-line, cached",
+        timeit.timeit(lambda: [h.side_pots() for h in all_hands], number=n),
+        n * N_HANDS,
+    )
+
+    # replay: every state seen twice, as the Next/Back buttons do
+    states = [s for h in all_hands for s in every_cursor(h)]
+    n = 20
+    report(
+        "side_pots() for every replay state, legacy",
+        timeit.timeit(lambda: [legacy_side_pots(s) for s in states], number=n),
+        n * N_HANDS,
+    )
+    report(
+        "side_pots() for every replay state, sweep-line",
+        timeit.timeit(lambda: [s.side_pots() for s in states], number=n),
+        n * N_HANDS,
+    )
+
+
+if __name__ == "__main__":
+    main()
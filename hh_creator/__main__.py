@@ -1,4 +1,5 @@
 import logging
+import multiprocessing
 import os
 import sys
 from argparse import ArgumentParser
@@ -14,6 +15,11 @@ from hh_creator.util import init_sounds
 
 
 def main():
+    if sys.argv[1:2] == ["render"]:
+        from hh_creator.batch import main as render
+
+        sys.exit(render(sys.argv[2:]))
+
     parser = ArgumentParser()
 
     parser.add_argument(
@@ -57,4 +63,7 @@ def main():
     sys.exit(app.exec())
 
 
-main()
+if __name__ == "__main__":
+    # the workers of "hh-creator render" import this module
+    multiprocessing.freeze_support()
+    main()
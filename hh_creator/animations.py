@@ -1,51 +1,152 @@
+"""
+Animations of a scene, on the clock of the scene.
+
+The animations added between reset() and start() make a step of the replay,
+and play together. Animating a property of an object that is already animated
+replaces the first animation, from where it is, and the callbacks of both are
+called at the end. The animation objects and the animated text items are reused
+once finished.
+"""
+
 import logging
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Tuple, Union
 
-from PyQt5 import QtCore
+from PyQt5 import QtCore, QtGui, QtWidgets, sip
 
+from .clock import Clock
 from .text import TextItem
 from .util import get_center
 
 
+@dataclass
+class Scheduled:
+    animation: QtCore.QPropertyAnimation
+    callbacks: List[Callable] = field(default_factory=list)
+    # the item moved by text(), released at the end
+    text_item: Union[None, TextItem] = None
+
+
 class Animations:
-    animations = []
-
-    @classmethod
-    def add_callback(cls, callback):
-        if not cls.animations:
-            raise ValueError
-        cls.animations[-1].finished.connect(callback)
-
-    @classmethod
-    def add(cls, animation):
-        cls.animations.append(animation)
-
-    @classmethod
-    def start(cls):
-        group = QtCore.QParallelAnimationGroup()
-        for i, a in enumerate(cls.animations):
-            if i == 0:
-                scene = a.parent()
-                group.setParent(scene)
-            scene.addItem(a.targetObject())
-            group.addAnimation(a)
-        group.start(group.DeleteWhenStopped)
-
-    @classmethod
-    def reset(cls):
-        cls.animations = []
-
-    @classmethod
+    # finished animations and text items kept for reuse
+    MAX_POOLED = 32
+
+    def __init__(self, scene: QtWidgets.QGraphicsScene):
+        self.scene = scene
+        self.clock = Clock()
+        # by target and property, in the order they were added
+        self._pending: Dict[Tuple[QtCore.QObject, bytes], Scheduled] = {}
+        self._live: Dict[Tuple[QtCore.QObject, bytes], Scheduled] = {}
+        self._last = None
+        self._free_animations: List[QtCore.QPropertyAnimation] = []
+        self._text_items: List[TextItem] = []
+
+    def n_live(self):
+        """The number of animations started and not finished yet."""
+        return len(self._live)
+
+    def reset(self):
+        for scheduled in self._pending.values():
+            self._recycle(scheduled.animation)
+            if scheduled.text_item is not None:
+                self._release_text_item(scheduled.text_item)
+        self._pending = {}
+        self._last = None
+
+    def add_callback(self, callback):
+        """Calls callback at the end of the last animation added."""
+        if self._last is None:
+            raise ValueError("No animation to add a callback to")
+        self._last.callbacks.append(callback)
+
+    def animate(
+        self,
+        target: QtCore.QObject,
+        property_name: bytes,
+        end_value,
+        duration: int,
+        start_value=None,
+        callbacks=(),
+    ):
+        """Adds an animation of a property, from its current value by default."""
+        key = (target, property_name)
+        replaced = self._pending.pop(key, None)
+        if replaced is not None:
+            animation = replaced.animation
+            callbacks = replaced.callbacks + list(callbacks)
+            start_value = animation.startValue()
+        else:
+            animation = self._take_animation()
+            animation.setTargetObject(target)
+            animation.setPropertyName(property_name)
+            if start_value is None:
+                start_value = target.property(property_name.decode())
+        animation.setStartValue(start_value)
+        animation.setEndValue(end_value)
+        animation.setDuration(duration)
+        self._last = self._pending[key] = Scheduled(animation, list(callbacks))
+
+    def start(self):
+        """Plays the animations added since the last reset()."""
+        pending, self._pending = self._pending, {}
+        self._last = None
+        for key, scheduled in pending.items():
+            target = scheduled.animation.targetObject()
+            if isinstance(target, QtWidgets.QGraphicsItem) and target.scene() is None:
+                self.scene.addItem(target)
+            running = self._live.pop(key, None)
+            if running is not None:
+                # goes on from where the running one is
+                running.animation.stop()
+                scheduled.animation.setStartValue(target.property(key[1].decode()))
+                scheduled.callbacks[:0] = running.callbacks
+                self._recycle(running.animation)
+            self._live[key] = scheduled
+            self.clock.start_animation(scheduled.animation, delete=False)
+
+    def finish(self):
+        """Ends the started animations at once, calling their callbacks."""
+        for scheduled in list(self._live.values()):
+            animation = scheduled.animation
+            animation.setCurrentTime(animation.totalDuration())
+
+    def _take_animation(self) -> QtCore.QPropertyAnimation:
+        if self._free_animations:
+            return self._free_animations.pop()
+        animation = QtCore.QPropertyAnimation(self.scene)
+        animation.finished.connect(partial(self._on_finished, animation))
+        return animation
+
+    def _recycle(self, animation: QtCore.QPropertyAnimation):
+        animation.setTargetObject(None)
+        if len(self._free_animations) < self.MAX_POOLED:
+            self._free_animations.append(animation)
+        else:
+            animation.deleteLater()
+
+    def _on_finished(self, animation: QtCore.QPropertyAnimation):
+        key = (animation.targetObject(), bytes(animation.propertyName()))
+        scheduled = self._live.get(key)
+        if scheduled is None or scheduled.animation is not animation:
+            return
+        del self._live[key]
+        self._recycle(animation)
+        if scheduled.text_item is not None:
+            self._release_text_item(scheduled.text_item)
+        for callback in scheduled.callbacks:
+            callback()
+
     def text(
-        cls,
+        self,
         source: TextItem,
         target: TextItem,
         duration: int,
-        scene,
         content=None,
-        callbacks=tuple(),
+        callbacks=(),
         target_font=False,
     ):
-        # print(f"Animating {source} to {target}")
+        """Moves an amount, or some text, from source to target."""
         if content is None:
             content = source.content
 
@@ -54,13 +155,7 @@ class Animations:
         else:
             font_kwargs = source.font_kwargs()
 
-        item_to_animate = TextItem(
-            hide_if_empty=source.hide_if_empty,
-            content_is_number=source.content_is_number,
-            currency=source.currency,
-            currency_is_after=source.currency_is_after,
-            **font_kwargs,
-        )
+        item_to_animate = self._take_text_item(source, **font_kwargs)
         item_to_animate.content = content
         item_to_animate.set_center(*get_center(source, scene=True))
 
@@ -69,19 +164,44 @@ class Animations:
         else:
             target_pos = target.get_pos_if_content(content)
 
-        animation = QtCore.QPropertyAnimation(scene)
-        animation.setTargetObject(item_to_animate)
-        animation.setPropertyName(b"pos")
-        animation.setStartValue(item_to_animate.scenePos())
-        animation.setEndValue(target_pos)
-        # animation.setEndValue(QtCore.QPointF(*get_center(target, scene=True)))
-        animation.setDuration(duration)
-        animation.finished.connect(item_to_animate.deleteLater)
-
-        for callback in callbacks:
-            animation.finished.connect(callback)
-
-        cls.animations.append(animation)
+        self.animate(
+            item_to_animate,
+            b"pos",
+            target_pos,
+            duration,
+            start_value=item_to_animate.scenePos(),
+            callbacks=callbacks,
+        )
+        self._last.text_item = item_to_animate
+
+    def _take_text_item(self, source: TextItem, point_size, color, weight):
+        if not self._text_items:
+            return TextItem(
+                hide_if_empty=source.hide_if_empty,
+                content_is_number=source.content_is_number,
+                currency=source.currency,
+                currency_is_after=source.currency_is_after,
+                point_size=point_size,
+                color=color,
+                weight=weight,
+            )
+        item = self._text_items.pop()
+        item.set_font(point_size, weight)
+        item.setDefaultTextColor(QtGui.QColor(color))
+        item.hide_if_empty = source.hide_if_empty
+        item.content_is_number = source.content_is_number
+        item.currency = source.currency
+        item.currency_is_after = source.currency_is_after
+        return item
+
+    def _release_text_item(self, item: TextItem):
+        # deleted with its scene
+        if sip.isdeleted(item):
+            return
+        if item.scene() is not None:
+            item.scene().removeItem(item)
+        if len(self._text_items) < self.MAX_POOLED:
+            self._text_items.append(item)
 
 
 log = logging.getLogger(__name__)
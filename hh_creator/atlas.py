@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import math
+from pathlib import Path
+from typing import ClassVar, Dict, List
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from . import config
+from .util import Image
+
+# bump to discard the atlases written by previous versions
+ATLAS_VERSION = 1
+
+
+class CardAtlas:
+    """
+    All the images of a deck (the 52 faces and the backs) rasterized once, at
+    the scale they are shown, in a single pixmap cached on disk.
+
+    Atlas files are keyed by a hash of the SVG files and of the resolution.
+    """
+
+    COLUMNS = 13
+    # transparent pixels around each image, so that smooth scaling does not
+    # pick the edges of its neighbours
+    PADDING = 2
+
+    _atlases: ClassVar[Dict[tuple, "CardAtlas"]] = {}
+
+    def __init__(self, root: Path, scale: float, pixel_ratio: float):
+        self.root = root
+        directory = Image.IMG_PATH / root
+        self.names: List[str] = sorted(p.stem for p in directory.glob("*.svg"))
+        self._index = {name: i for i, name in enumerate(self.names)}
+        renderer = Image.renderer(root / self.names[0])
+        # size of an image in item coordinates, as for a QGraphicsSvgItem
+        self.size = QtCore.QSizeF(renderer.defaultSize())
+        self.tile_size = QtCore.QSize(
+            math.ceil(self.size.width() * scale * pixel_ratio),
+            math.ceil(self.size.height() * scale * pixel_ratio),
+        )
+        rows = math.ceil(len(self.names) / self.COLUMNS)
+        self._atlas_size = QtCore.QSize(
+            self.COLUMNS * (self.tile_size.width() + 2 * self.PADDING),
+            rows * (self.tile_size.height() + 2 * self.PADDING),
+        )
+
+        digest = hashlib.sha1(f"{ATLAS_VERSION} {self.tile_size}".encode())
+        for name in self.names:
+            digest.update((directory / f"{name}.svg").read_bytes())
+        self.filename = (
+            config.cache_dir / f"atlas-{root.name}-{digest.hexdigest()[:16]}.png"
+        )
+        self.pixmap = self._load() or self._render()
+
+    @classmethod
+    def get(cls, root: Path, scale: float) -> "CardAtlas":
+        app = QtWidgets.QApplication.instance()
+        pixel_ratio = app.devicePixelRatio() * config.config["look"].getfloat(
+            "card_atlas_oversampling"
+        )
+        key = root, scale, pixel_ratio
+        try:
+            return cls._atlases[key]
+        except KeyError:
+            atlas = cls._atlases[key] = cls(root, scale, pixel_ratio)
+            return atlas
+
+    def source_rect(self, name) -> QtCore.QRectF:
+        """The part of the pixmap showing an image, named as its file."""
+        i = self._index[name]
+        w = self.tile_size.width()
+        h = self.tile_size.height()
+        x = (i % self.COLUMNS) * (w + 2 * self.PADDING) + self.PADDING
+        y = (i // self.COLUMNS) * (h + 2 * self.PADDING) + self.PADDING
+        return QtCore.QRectF(x, y, w, h)
+
+    def _load(self):
+        pixmap = QtGui.QPixmap(str(self.filename))
+        if pixmap.isNull():
+            return None
+        if pixmap.size() != self._atlas_size:
+            log.warning(f"Ignoring {self.filename}, its size is {pixmap.size()}")
+            return None
+        log.debug(f"Loaded card atlas {self.filename}")
+        return pixmap
+
+    def _render(self):
+        log.info(f"Rendering card atlas {self.filename}")
+        image = QtGui.QImage(self._atlas_size, QtGui.QImage.Format_ARGB32_Premultiplied)
+        image.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(image)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        for name in self.names:
+            rect = self.source_rect(name)
+            # the cut cards draw past their view box, as QGraphicsSvgItem clips
+            painter.setClipRect(rect)
+            Image.renderer(self.root / name).render(painter, rect)
+        painter.end()
+        try:
+            config.cache_dir.mkdir(parents=True, exist_ok=True)
+            if not image.save(str(self.filename)):
+                raise OSError("QImage.save() failed")
+        except OSError as e:
+            log.warning(f"Cannot write {self.filename}: {e}")
+        return QtGui.QPixmap.fromImage(image)
+
+
+class AtlasItem(QtWidgets.QGraphicsItem):
+    """
+    Shows one image of a CardAtlas, in the coordinates of the SVG file it
+    comes from, so that it can replace a QGraphicsSvgItem.
+    """
+
+    def __init__(self, atlas: CardAtlas, name, parent=None):
+        super().__init__(parent)
+        self.atlas = atlas
+        self._rect = QtCore.QRectF(QtCore.QPointF(0, 0), atlas.size)
+        self._source = atlas.source_rect(name)
+
+    def set_image(self, name):
+        self._source = self.atlas.source_rect(name)
+        self.update()
+
+    def boundingRect(self):
+        return self._rect
+
+    def paint(self, painter, option, widget=None):
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        painter.drawPixmap(self._rect, self.atlas.pixmap, self._source)
+
+
+log = logging.getLogger(__name__)
@@ -0,0 +1,223 @@
+"""
+Batch export of the replays of a directory of hand history files.
+
+    hh-creator render HANDS_DIR OUTPUT_DIR [--workers N] [--y4m]
+
+Each hand is exported as in hh_creator.export, to OUTPUT_DIR/<name>/ (PNG
+frames) or OUTPUT_DIR/<name>.y4m, by a pool of processes each running its own
+offscreen QApplication. OUTPUT_DIR/manifest.json records the finished jobs, so
+that running the same command again only exports new, modified or failed
+hands, or everything if the export settings changed.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict
+from pathlib import Path
+from queue import Empty
+
+from .export import ExportSettings, add_arguments, settings_from_args
+
+MANIFEST_FILENAME = "manifest.json"
+# threads writing the PNG files of a worker, the workers already use the CPUs
+ENCODER_THREADS = 1
+
+# set in each worker process by _init_worker()
+_app = None
+_main_window = None
+_progress = None
+
+
+class Manifest:
+    def __init__(self, filename: Path, settings: dict):
+        self.filename = filename
+        self.settings = settings
+        try:
+            with filename.open(encoding="utf-8") as fp:
+                obj = json.load(fp)
+        except FileNotFoundError:
+            obj = {"settings": settings, "jobs": {}}
+        if obj["settings"] != settings:
+            log.info("Export settings changed, all hands will be exported again")
+            obj["jobs"] = {}
+        self.jobs = obj["jobs"]
+
+    def is_done(self, name, digest):
+        job = self.jobs.get(name)
+        return job is not None and job["status"] == "done" and job["sha1"] == digest
+
+    def record(self, name, **job):
+        self.jobs[name] = job
+        # written on the side then renamed, so that an interruption never
+        # leaves a truncated manifest
+        tmp = self.filename.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as fp:
+            json.dump({"settings": self.settings, "jobs": self.jobs}, fp, indent=2)
+        tmp.replace(self.filename)
+
+
+def render(hands_dir, output_dir, settings: ExportSettings, y4m=False, workers=None):
+    """Exports every .hh file of hands_dir, returns the number of failures."""
+    hands_dir = Path(hands_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(output_dir / MANIFEST_FILENAME, dict(asdict(settings), y4m=y4m))
+
+    jobs = {}
+    filenames = sorted(hands_dir.glob("*.hh"))
+    for filename in filenames:
+        digest = hashlib.sha1(filename.read_bytes()).hexdigest()
+        if manifest.is_done(filename.name, digest):
+            log.debug(f"Skipping {filename.name}, already exported")
+            continue
+        output = output_dir / (filename.stem + ".y4m" if y4m else filename.stem)
+        jobs[filename.name] = filename, output, digest
+    n_skipped = len(filenames) - len(jobs)
+    log.info(f"{len(jobs)} hands to export, {n_skipped} already exported")
+    if not jobs:
+        return 0
+
+    # fork would copy the state of Qt if it was already used in this process
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        progress = manager.Queue()
+        with ProcessPoolExecutor(
+            workers, context, initializer=_init_worker, initargs=(progress,)
+        ) as executor:
+            futures = {
+                executor.submit(_export, filename, output, settings): name
+                for name, (filename, output, _) in jobs.items()
+            }
+            n_done = n_failed = 0
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(
+                    pending, timeout=0.5, return_when=FIRST_COMPLETED
+                )
+                _log_progress(progress)
+                for future in finished:
+                    name = futures[future]
+                    n_done += 1
+                    error = future.exception()
+                    if error is not None:
+                        n_failed += 1
+                        log.error(f"[{n_done}/{len(jobs)}] {name} failed: {error!r}")
+                        manifest.record(name, status="failed", sha1=jobs[name][2])
+                        continue
+                    n_frames, seconds = future.result()
+                    log.info(
+                        f"[{n_done}/{len(jobs)}] {name}: {n_frames} frames "
+                        f"in {seconds:.1f} s"
+                    )
+                    manifest.record(
+                        name,
+                        status="done",
+                        sha1=jobs[name][2],
+                        output=str(jobs[name][1]),
+                        frames=n_frames,
+                    )
+    return n_failed
+
+
+def _log_progress(progress):
+    while True:
+        try:
+            name, n_steps, n_frames = progress.get_nowait()
+        except Empty:
+            return
+        log.info(f"{name}: step {n_steps}, {n_frames} frames")
+
+
+def _init_worker(progress):
+    global _app, _main_window, _progress
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PyQt5 import QtWidgets
+
+    _app = QtWidgets.QApplication([sys.argv[0]])
+
+    from .main_window import MainWindow
+    from .util import init_sounds
+
+    init_sounds(muted=True)
+    # the window is reused for all the hands of this worker, as when files
+    # are opened one after the other in the GUI
+    _main_window = MainWindow(show_new_hh_dialog=False)
+    _progress = progress
+
+
+def _export(filename: Path, output: Path, settings: ExportSettings):
+    from .export import Exporter, open_writer
+
+    start = time.perf_counter()
+    # rendered on the side: the frames of a failed export, or of a longer
+    # previous one, never mix with the new ones; the suffix picks the format
+    partial = output.with_name(output.stem + ".part" + output.suffix)
+    _remove(partial)
+    try:
+        writer = open_writer(str(partial), settings, n_threads=ENCODER_THREADS)
+        Exporter(_main_window, settings).export(
+            filename,
+            writer,
+            progress=lambda n_steps, n_frames: _progress.put(
+                (filename.name, n_steps, n_frames)
+            ),
+        )
+    except BaseException:
+        _remove(partial)
+        raise
+    _publish(partial, output)
+    return writer.n_frames, time.perf_counter() - start
+
+
+def _publish(partial: Path, output: Path):
+    """Replaces output, a directory of frames or a file, by partial."""
+    _remove(output)
+    partial.replace(output)
+
+
+def _remove(path: Path):
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        prog="hh-creator render",
+        description="Export the replays of all the .hh files of a directory",
+    )
+    parser.add_argument("hands_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of processes rendering hands at the same time",
+    )
+    parser.add_argument(
+        "--y4m", action="store_true", help="write Y4M files instead of PNG frames"
+    )
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    n_failed = render(
+        args.hands_dir,
+        args.output_dir,
+        settings_from_args(args),
+        y4m=args.y4m,
+        workers=args.workers,
+    )
+    return 1 if n_failed else 0
+
+
+log = logging.getLogger(__name__)
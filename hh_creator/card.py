@@ -1,66 +1,19 @@
-import itertools
 import logging
-from dataclasses import dataclass
-from functools import total_ordering
 from pathlib import Path
 from typing import TYPE_CHECKING, List, Union
 
-from deuces import Card as DeucesCard
-from deuces import Evaluator
-from PyQt5 import Qt, QtCore, QtWidgets
+from PyQt5 import Qt, QtCore, QtGui, QtWidgets
 
 from . import config
-from .poker_enum import PokerEnum
+from .atlas import AtlasItem, CardAtlas
+from .core import evaluator
+from .core.enums import Rank, Suit
 from .util import Image
 
 if TYPE_CHECKING:
     from .player import PlayerItemGroup
 
 
-class Suit(PokerEnum):
-    CLUBS = "♣", "c", "clubs", "Trefle"
-    DIAMONDS = "♦", "d", "diamonds", "Carreau"
-    HEARTS = "♥", "h", "hearts", "Coeur"
-    SPADES = "♠", "s", "spades", "Pique"
-
-    def one_letter_format(self):
-        return str(self._value_[1])
-
-
-class Rank(PokerEnum):
-    DEUCE = "2", 2
-    THREE = "3", 3
-    FOUR = "4", 4
-    FIVE = "5", 5
-    SIX = "6", 6
-    SEVEN = "7", 7
-    EIGHT = "8", 8
-    NINE = "9", 9
-    TEN = "T", 10
-    JACK = "J", 11
-    QUEEN = "Q", 12
-    KING = "K", 13
-    ACE = "A", 14
-
-    @classmethod
-    def difference(cls, first, second):
-        """Tells the numerical difference between two ranks."""
-
-        # so we always get a Rank instance even if string were passed in
-        first, second = cls(first), cls(second)
-        rank_list = list(cls)
-        return abs(rank_list.index(first) - rank_list.index(second))
-
-    def next(self):
-        return Rank(self._value_[1] + 1)
-
-    def prev(self):
-        return Rank(self._value_[1] - 1)
-
-    def one_letter_format(self):
-        return str(self._value_[0])
-
-
 class CardLook(QtWidgets.QGraphicsItemGroup):
     instances = []
 
@@ -73,19 +26,16 @@ class CardLook(QtWidgets.QGraphicsItemGroup):
     ):
         root = Path("cards_cut") if crop_bottom else Path("cards")
         super().__init__(*a, **kw)
+        self.root = root
         self.scale_factor = scale_factor
-        self.faces = {
-            (rank, suit): Image.get(
-                root / f"{rank.one_letter_format()}{suit.one_letter_format()}"
-            )
-            for rank in Rank
-            for suit in Suit
-        }
-        for k in self.faces.values():
-            self.addToGroup(k)
-            k.setVisible(False)
-            k.setScale(scale_factor)
-        self.back = Image.get(root / "back-red")
+        if config.config["look"].getboolean("card_atlas"):
+            self.atlas = CardAtlas.get(root, scale_factor)
+        else:
+            self.atlas = None
+        # a single item for the face, created when the card is first known and
+        # given the image of the current rank and suit afterwards
+        self.face: Union[Qt.QGraphicsSvgItem, AtlasItem, None] = None
+        self.back = self._image("back-red")
         self.back.setScale(scale_factor)
         self.scale_factor = scale_factor
         self.addToGroup(self.back)
@@ -96,19 +46,47 @@ class CardLook(QtWidgets.QGraphicsItemGroup):
             self.back.setVisible(True)
             return
         self.back.setVisible(False)
-        for (rank, suit), item in self.faces.items():
-            item.setVisible((rank, suit) == (self._rank, self._suit))
+        name = f"{self._rank.one_letter_format()}{self._suit.one_letter_format()}"
+        if self.face is None:
+            self.face = self._image(name)
+            self.addToGroup(self.face)
+            # addToGroup() keeps the scene geometry of the item, but the face
+            # goes where the back is, as if added when the group was created
+            self.face.setTransform(QtGui.QTransform())
+            self.face.setPos(0, 0)
+            self.face.setScale(self.scale_factor)
+            # hide_face() shows the back on top of the face
+            self.face.stackBefore(self.back)
+        elif self.atlas is not None:
+            self.face.set_image(name)
+        else:
+            self.face.setSharedRenderer(Image.renderer(self.root / name))
+
+    def _image(self, name):
+        if self.atlas is not None:
+            return AtlasItem(self.atlas, name)
+        return Image.get(self.root / name)
 
     def boundingRect(self):
-        rect_f = super().boundingRect()
+        # unscaled, like the rect of the items when they are added to the group
+        rect_f = self.back.boundingRect()
         scaled = Qt.QRectF(*(x * self.scale_factor for x in rect_f.getCoords()))
         return scaled
 
     @classmethod
     def change_back(cls, color):
+        previous = config.config["look"]["card-back"]
         config.config["look"]["card-back"] = color
         config.save_config()
+        if previous != color:
+            Image.invalidate(
+                Path("cards") / f"back-{previous}",
+                Path("cards_cut") / f"back-{previous}",
+            )
         for i in cls.instances:
+            if i.atlas is not None:
+                i.back.set_image(f"back-{color}")
+                continue
             visible = i.back.isVisible()
             i.back.deleteLater()
             pos = i.back.scenePos()
@@ -213,9 +191,6 @@ class CardItem(CardLook):
         except AttributeError:
             return "xx"
 
-    def to_deuces(self):
-        return DeucesCard.new(self.deuces_format())
-
     @classmethod
     def reset(cls):
         for c in cls.instances:
@@ -223,44 +198,12 @@ class CardItem(CardLook):
             c.suit = None
 
 
-@total_ordering
-@dataclass
-class Hand:
-    cards: List[CardItem]
-    board: List[CardItem]
-
-    def __gt__(self, other: "Hand"):
-        return self.deuces_score() < other.deuces_score()
-
-    def __eq__(self, other: "Hand"):
-        return self.deuces_score() == other.deuces_score()
-
-    def deuces_score(self):
-        return evaluator.evaluate(
-            [c.to_deuces() for c in self.cards], [c.to_deuces() for c in self.board]
-        )
-
-
 def get_winners(player_items: List["PlayerItemGroup"], board: List["CardItem"]):
-    scores = []
-    for player in player_items:
-        if player.n_cards == 2:
-            scores.append(Hand(cards=player.card_items[:2], board=board).deuces_score())
-        else:
-            all_scores = []
-            for c1, c2 in itertools.combinations(player.card_items, 2):
-                for b1, b2, b3 in itertools.combinations(board, 3):
-                    all_scores.append(
-                        Hand(cards=[c1, c2, b1, b2, b3], board=[]).deuces_score()
-                    )
-            scores.append(min(all_scores))
-
-    min_ = min(scores)
-    winners = [p for p, s in zip(player_items, scores) if s == min_]
-    return winners
-
-
-evaluator = Evaluator()
+    hands = [
+        [c.deuces_format() for c in p.card_items[: p.n_cards]] for p in player_items
+    ]
+    winners = evaluator.winners(hands, [c.deuces_format() for c in board])
+    return [player_items[i] for i in winners]
 
 
 log = logging.getLogger(__name__)
@@ -0,0 +1,181 @@
+"""
+Time of the animations and timers of the table.
+
+Every animation and timer follows the Clock of its scene instead of running on
+its own. Normally a Qt timer ticks it with the wall clock multiplied by
+time_scale: 0 skips the animations, 2 plays them twice as fast... In manual
+mode, nothing moves until tick() is called, which lets the offscreen export
+render exact frames as fast as it can. Each scene having its own clock, the
+export of a scene doesn't stop the animations of another.
+"""
+
+import logging
+from typing import Dict, List, Union
+
+from PyQt5 import QtCore, sip
+
+from . import config
+
+
+class Clock:
+    """The time of the animations and timers of a scene."""
+
+    # interval of the ticks following the wall clock, in milliseconds
+    TICK_INTERVAL = 10
+
+    def __init__(self, time_scale: Union[None, float] = None):
+        if time_scale is None:
+            time_scale = config.config["animation"].getfloat("time_scale")
+        self.time_scale = time_scale
+        self.manual = False
+        # milliseconds, in the time of the clock
+        self.now = 0
+
+        # start times, a restarted animation only has its last one
+        self._animations: Dict[QtCore.QAbstractAnimation, float] = {}
+        self._timers: List[Timer] = []
+        self._driver = None
+        self._elapsed = None
+        # wall clock of the last tick, in milliseconds since the driver started
+        self._wall = 0
+
+    def set_manual(self, manual=True):
+        self.manual = manual
+        self.now = 0
+        self._animations = {}
+        self._timers = []
+        if self._driver is not None:
+            self._driver.stop()
+
+    def set_time_scale(self, time_scale: float):
+        self.time_scale = time_scale
+        if self._driver is not None and self._driver.isActive():
+            self._driver.start(self._interval())
+
+    def start_animation(
+        self, animation: QtCore.QAbstractAnimation, delay=0, delete=True
+    ):
+        """Plays animation from delay milliseconds from now, on the clock."""
+        if delete:
+            animation.start(animation.DeleteWhenStopped)
+        else:
+            animation.start()
+        # empty animations are already stopped
+        if animation.state() == animation.Running:
+            animation.pause()
+            self._animations[animation] = self._current_time() + delay
+            self._wake()
+
+    def tick(self, ms):
+        """Moves the clock forward, firing the timers on the way."""
+        end = self.now + ms
+        while self._timers:
+            timer = min(self._timers, key=lambda t: t.deadline)
+            if timer.deadline > end:
+                break
+            self._set_time(timer.deadline)
+            self._timers.remove(timer)
+            timer.timeout.emit()
+        self._set_time(end)
+
+    def flush(self):
+        """Finishes the running animations and fires the pending timers."""
+        while not self.is_idle():
+            ends = [t.deadline for t in self._timers]
+            ends.extend(
+                start + a.totalDuration() for a, start in self._animations.items()
+            )
+            self.tick(max(ends) - self.now)
+            # at their end but not stopped, they would be ticked forever
+            for animation, start in list(self._animations.items()):
+                if start + animation.totalDuration() <= self.now:
+                    del self._animations[animation]
+
+    def is_idle(self):
+        return not self._animations and not self._timers
+
+    def _current_time(self):
+        # now is only updated by the ticks, which can be a bit late
+        if self._driver is not None and self._driver.isActive():
+            return self.now + (self._wall_time() - self._wall) * self.time_scale
+        return self.now
+
+    def _wall_time(self):
+        # not elapsed(): rounding each tick to the millisecond loses time
+        return self._elapsed.nsecsElapsed() / 1e6
+
+    def _set_time(self, now):
+        self.now = now
+        # the callbacks of the finished animations can start others
+        for animation, start in list(self._animations.items()):
+            # deleted with the scene
+            if sip.isdeleted(animation):
+                del self._animations[animation]
+                continue
+            animation.setCurrentTime(_animation_time(animation, now - start))
+            if (
+                animation.state() == animation.Stopped
+                and self._animations.get(animation) == start
+            ):
+                del self._animations[animation]
+
+    def _wake(self):
+        if self.manual:
+            return
+        if self._driver is None:
+            self._driver = QtCore.QTimer()
+            self._driver.timeout.connect(self._on_driver_timeout)
+            self._elapsed = QtCore.QElapsedTimer()
+        if not self._driver.isActive():
+            self._elapsed.start()
+            self._wall = 0
+            self._driver.start(self._interval())
+
+    def _interval(self):
+        return 0 if self.time_scale == 0 else self.TICK_INTERVAL
+
+    def _on_driver_timeout(self):
+        if self.time_scale == 0:
+            self.flush()
+        else:
+            wall = self._wall_time()
+            self.tick((wall - self._wall) * self.time_scale)
+            self._wall = wall
+        if self.is_idle():
+            self._driver.stop()
+
+
+def _animation_time(animation: QtCore.QAbstractAnimation, elapsed: float) -> int:
+    # start + duration - start can be a bit less than the duration
+    duration = animation.totalDuration()
+    if 0 <= duration <= elapsed:
+        return duration
+    return round(elapsed)
+
+
+class Timer(QtCore.QObject):
+    """A single shot timer following a Clock."""
+
+    timeout = QtCore.pyqtSignal()
+
+    def __init__(self, clock: Clock, parent=None):
+        super().__init__(parent)
+        self.clock = clock
+        self.deadline = None
+
+    def start(self, ms):
+        clock = self.clock
+        self.deadline = clock._current_time() + ms
+        if self not in clock._timers:
+            clock._timers.append(self)
+        clock._wake()
+
+    def stop(self):
+        if self in self.clock._timers:
+            self.clock._timers.remove(self)
+
+    def isActive(self):
+        return self in self.clock._timers
+
+
+log = logging.getLogger(__name__)
@@ -52,6 +52,8 @@ else:
 config_filename = config_dir / "config.ini"
 geometry_filename = config_dir / "geometry.bin"
 state_filename = config_dir / "state.bin"
+# files that can be rebuilt, such as the card atlases
+cache_dir = config_dir / "cache"
 
 try:
     with geometry_filename.open("rb") as fp:
@@ -0,0 +1,6 @@
+"""
+Hand engine, enums, serialization and hand evaluation.
+
+Nothing in this package imports PyQt5 or the configuration, so it can be used
+by headless tools.
+"""
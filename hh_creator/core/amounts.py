@@ -0,0 +1,41 @@
+import logging
+from decimal import Decimal, InvalidOperation
+
+
+def decimal_conversion(text):
+    if isinstance(text, Decimal):
+        return text
+    try:
+        return Decimal(text.replace(",", "."))
+    except InvalidOperation:
+        log.warning(f"Error converting {text} to decimal, returning 0")
+        return Decimal(0)
+
+
+def int_conversion(text):
+    try:
+        return int(text)
+    except InvalidOperation:
+        log.warning(f"Error converting {text} to int, returning 0")
+        return 0
+
+
+def amount_format(x, n_decimals=3):
+    if not isinstance(x, Decimal):
+        x = Decimal(str(x))  # Convert to Decimal to avoid precision issues
+
+    x = round(x, n_decimals)
+
+    # Normalize the number by removing trailing zeroes.
+    # "f" prevents scientific notation.
+    return format(x.normalize(), "f")
+
+
+def amount_decimals(*amounts):
+    """Number of decimals needed to represent all amounts, at least 1."""
+    return max(
+        [-Decimal(x).as_tuple().exponent for x in amounts if x is not None] + [1]
+    )
+
+
+log = logging.getLogger(__name__)
@@ -0,0 +1,118 @@
+"""
+Reading and writing hand history files (.hh).
+
+A file is a JSON object holding the hand (blinds, stacks and actions), plus
+whatever the GUI stores next to it (names, cards, seats...). Amounts are
+written as {"decimal": "1.5"} objects.
+
+Versions:
+
+- 0: files without a "version" key, which may lack "n_decimals"
+- 1: "version" and "n_decimals" are always present
+"""
+
+import json
+import logging
+from decimal import Decimal
+
+from .amounts import amount_decimals
+
+FORMAT_VERSION = 1
+
+# keys of the hand holding an amount, or None
+AMOUNT_KEYS = (
+    "small_blind",
+    "big_blind",
+    "ante",
+    "bb_ante",
+    "total_pot",
+    "largest_blind",
+    # the stack of the player, kept as written by previous versions
+    "current_player",
+    "winner",
+)
+
+
+class UnsupportedVersion(ValueError):
+    pass
+
+
+def hand_to_dict(hand_history) -> dict:
+    """The hand part of a file, with Decimal amounts."""
+    to_decimal = hand_history.to_decimal
+    return {
+        "version": FORMAT_VERSION,
+        "small_blind": to_decimal(hand_history.small_blind),
+        "big_blind": to_decimal(hand_history.big_blind),
+        "actions": [
+            {"type": str(a.action_type), "amount": to_decimal(a.amount)}
+            for a in hand_history.actions
+        ],
+        "ante": to_decimal(hand_history.ante),
+        "bb_ante": to_decimal(hand_history.bb_ante),
+        "players": [to_decimal(p.initial_stack) for p in hand_history.players],
+        # always null in version 0 files, never read
+        "current_street": None,
+        "current_player": _stack(hand_history.current_player),
+        "total_pot": to_decimal(hand_history.total_pot),
+        "winner": _stack(hand_history.winner),
+        "n_straddle": hand_history.n_straddle,
+        "largest_blind": to_decimal(hand_history.largest_blind),
+    }
+
+
+def dump(obj: dict, fp):
+    json.dump(obj, fp, default=_encode)
+
+
+def dumps(obj: dict) -> str:
+    return json.dumps(obj, default=_encode)
+
+
+def load(fp) -> dict:
+    return decode(json.load(fp))
+
+
+def loads(string: str) -> dict:
+    return decode(json.loads(string))
+
+
+def decode(obj: dict) -> dict:
+    """Converts the amounts of a parsed file to Decimal and upgrades it."""
+    version = obj.get("version", 0)
+    if version > FORMAT_VERSION:
+        raise UnsupportedVersion(
+            f"File format version {version} is newer than {FORMAT_VERSION}"
+        )
+    for k in AMOUNT_KEYS:
+        obj[k] = _decimal(obj.get(k))
+    obj["players"] = [_decimal(stack) for stack in obj["players"]]
+    for action in obj["actions"]:
+        action["amount"] = _decimal(action["amount"])
+
+    if version < 1:
+        obj.setdefault("n_decimals", amount_decimals(obj["small_blind"], obj["ante"]))
+        log.info(f"Upgraded file from format version {version}")
+    obj["version"] = FORMAT_VERSION
+    return obj
+
+
+def _stack(player):
+    if player is None:
+        return None
+    return player.hand_history.to_decimal(player.initial_stack)
+
+
+def _encode(o):
+    if isinstance(o, Decimal):
+        return {"decimal": str(o)}
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _decimal(o):
+    if isinstance(o, dict):
+        return Decimal(o["decimal"])
+    return o
+
+
+log = logging.getLogger(__name__)
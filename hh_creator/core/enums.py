@@ -0,0 +1,84 @@
+from enum import Enum
+
+from .poker_enum import PokerEnum
+
+
+class ActionType(PokerEnum):
+    ANTE = ("post ante",)
+    SB = ("post SB",)
+    BB = ("post BB",)
+    BET = "bet", "bets"
+    RAISE = "raise", "raises"
+    CHECK = "check", "checks"
+    FOLD = "fold", "folded", "folds"
+    CALL = "call", "calls"
+    RETURN = "return", "returned", "uncalled"
+    WIN = "win", "won", "collected"
+    SHOW = ("show",)
+    MUCK = "don't show", "didn't show", "did not show", "mucks"
+    THINK = ("seconds left to act",)
+    STRADDLE = ("straddle",)
+
+
+BLINDS = [ActionType.SB, ActionType.BB, ActionType.STRADDLE]
+
+
+class IncrementableEnum(Enum):
+    def next(self):
+        return self.__class__(self._value_ + 1)
+
+    def prev(self):
+        return self.__class__(self._value_ - 1)
+
+    def __str__(self):
+        return self._name_
+
+    def __gt__(self, other):
+        return self._value_ > other._value_
+
+    def __sub__(self, other):
+        return self._value_ - other._value_
+
+
+class Suit(PokerEnum):
+    CLUBS = "♣", "c", "clubs", "Trefle"
+    DIAMONDS = "♦", "d", "diamonds", "Carreau"
+    HEARTS = "♥", "h", "hearts", "Coeur"
+    SPADES = "♠", "s", "spades", "Pique"
+
+    def one_letter_format(self):
+        return str(self._value_[1])
+
+
+class Rank(PokerEnum):
+    DEUCE = "2", 2
+    THREE = "3", 3
+    FOUR = "4", 4
+    FIVE = "5", 5
+    SIX = "6", 6
+    SEVEN = "7", 7
+    EIGHT = "8", 8
+    NINE = "9", 9
+    TEN = "T", 10
+    JACK = "J", 11
+    QUEEN = "Q", 12
+    KING = "K", 13
+    ACE = "A", 14
+
+    @classmethod
+    def difference(cls, first, second):
+        """Tells the numerical difference between two ranks."""
+
+        # so we always get a Rank instance even if string were passed in
+        first, second = cls(first), cls(second)
+        rank_list = list(cls)
+        return abs(rank_list.index(first) - rank_list.index(second))
+
+    def next(self):
+        return Rank(self._value_[1] + 1)
+
+    def prev(self):
+        return Rank(self._value_[1] - 1)
+
+    def one_letter_format(self):
+        return str(self._value_[0])
@@ -0,0 +1,34 @@
+import itertools
+from typing import List
+
+from deuces import Card, Evaluator
+
+
+def score(hole_cards: List[str], board: List[str]) -> int:
+    """
+    deuces score of the best hand, the lower the better.
+
+    Cards are in deuces format, e.g. "Ah". With more than 2 hole cards, exactly
+    2 of them and 3 cards of the board are used, as in Omaha.
+    """
+    if len(hole_cards) == 2:
+        return evaluator.evaluate(_to_deuces(hole_cards), _to_deuces(board))
+    return min(
+        evaluator.evaluate(_to_deuces(hole + three), [])
+        for hole in itertools.combinations(hole_cards, 2)
+        for three in itertools.combinations(board, 3)
+    )
+
+
+def winners(hands: List[List[str]], board: List[str]) -> List[int]:
+    """Indices of the hands that win the pot."""
+    scores = [score(hole_cards, board) for hole_cards in hands]
+    min_ = min(scores)
+    return [i for i, s in enumerate(scores) if s == min_]
+
+
+def _to_deuces(cards):
+    return [Card.new(c) for c in cards]
+
+
+evaluator = Evaluator()
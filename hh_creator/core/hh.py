@@ -0,0 +1,1182 @@
+import logging
+from array import array
+from bisect import bisect_left, insort
+from copy import copy
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Tuple, Union
+
+from . import codec
+from .amounts import amount_decimals
+from .enums import BLINDS, ActionType, IncrementableEnum
+from .poker_enum import PokerEnum
+
+
+class Position(PokerEnum):
+    UTG = "UTG", "under the gun"
+    UTG1 = "UTG1", "utg+1", "utg + 1"
+    UTG2 = "UTG2", "utg+2", "utg + 2"
+    UTG3 = "UTG3", "utg+3", "utg + 3"
+    UTG4 = "UTG4", "utg+4", "utg + 4"
+    HJ = "HJ", "hijack", "utg+5", "utg + 5"
+    CO = "CO", "cutoff", "cut off"
+    BTN = "BTN", "bu", "button"
+    SB = "SB", "small blind"
+    BB = "BB", "big blind"
+
+
+POSITIONS = {
+    2: [Position.SB, Position.BB],
+    3: [Position.SB, Position.BB, Position.BTN],
+    4: [Position.SB, Position.BB, Position.UTG, Position.BTN],
+    5: [Position.SB, Position.BB, Position.UTG, Position.CO, Position.BTN],
+    6: [Position.SB, Position.BB, Position.UTG, Position.HJ, Position.CO, Position.BTN],
+    7: [
+        Position.SB,
+        Position.BB,
+        Position.UTG,
+        Position.UTG1,
+        Position.HJ,
+        Position.CO,
+        Position.BTN,
+    ],
+    8: [
+        Position.SB,
+        Position.BB,
+        Position.UTG,
+        Position.UTG1,
+        Position.UTG2,
+        Position.HJ,
+        Position.CO,
+        Position.BTN,
+    ],
+    9: [
+        Position.SB,
+        Position.BB,
+        Position.UTG,
+        Position.UTG1,
+        Position.UTG2,
+        Position.UTG3,
+        Position.HJ,
+        Position.CO,
+        Position.BTN,
+    ],
+    10: [
+        Position.SB,
+        Position.BB,
+        Position.UTG,
+        Position.UTG1,
+        Position.UTG2,
+        Position.UTG3,
+        Position.UTG4,
+        Position.HJ,
+        Position.CO,
+        Position.BTN,
+    ],
+}
+
+
+NOT_EDITABLE = BLINDS + [ActionType.ANTE]
+
+
+class HandHistoryException(Exception):
+    def __init__(self, message=""):
+        self.message = message
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self.message}"
+
+
+class InvalidAction(HandHistoryException):
+    pass
+
+
+class InvalidAmount(HandHistoryException):
+    pass
+
+
+class InconsistentState(HandHistoryException):
+    pass
+
+
+class FixedPoint:
+    """
+    Conversion between Decimal amounts and integer numbers of the smallest
+    chip, i.e., 10 ** -n_decimals.
+    """
+
+    def __init__(self, n_decimals: int):
+        self.n_decimals = n_decimals
+
+    def __repr__(self):
+        return f"FixedPoint({self.n_decimals})"
+
+    def to_chips(self, amount: Decimal) -> int:
+        chips = Decimal(amount).scaleb(self.n_decimals)
+        if chips != chips.to_integral_value():
+            raise InvalidAmount(
+                f"{amount} cannot be represented with {self.n_decimals} decimals"
+            )
+        return int(chips)
+
+    def to_decimal(self, chips: int) -> Decimal:
+        return Decimal(chips).scaleb(-self.n_decimals)
+
+
+class Street(IncrementableEnum):
+    ANTE = 0
+    PRE_FLOP = 1
+    FLOP = 2
+    TURN = 3
+    RIVER = 4
+    SHOWDOWN = 5
+
+
+# code 0 stands for None in the arrays of ActionLog
+_STREETS = [None, *Street]
+_STREET_CODES = {street: code for code, street in enumerate(_STREETS)}
+_ACTION_TYPES = [None, *ActionType]
+_ACTION_TYPE_CODES = {t: code for code, t in enumerate(_ACTION_TYPES)}
+# action types setting the minimum raise of the street
+_MIN_RAISE_CODES = {
+    _ACTION_TYPE_CODES[t]
+    for t in (ActionType.BET, ActionType.RAISE, ActionType.BB, ActionType.STRADDLE)
+}
+
+
+class ActionLog:
+    """
+    The actions of a hand, stored column-wise: the street, player and action
+    type codes are kept in parallel arrays, the amounts in parallel lists.
+
+    Items are Action objects, which are views on a row of the log.
+    """
+
+    __slots__ = (
+        "action_types",
+        "added_to_pot",
+        "amounts",
+        "player_codes",
+        "players",
+        "streets",
+    )
+
+    def __init__(self):
+        # player code - 1 -> Player
+        self.players: List[Player] = []
+        self.streets = array("b")
+        self.player_codes = array("b")
+        self.action_types = array("b")
+        self.amounts: List[Union[Decimal, int, None]] = []
+        self.added_to_pot: List[Union[Decimal, int]] = []
+
+    def __len__(self):
+        return len(self.streets)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            log = ActionLog()
+            log.players = self.players[:]
+            log.streets = self.streets[item]
+            log.player_codes = self.player_codes[item]
+            log.action_types = self.action_types[item]
+            log.amounts = self.amounts[item]
+            log.added_to_pot = self.added_to_pot[item]
+            return log
+        n = len(self)
+        if item < 0:
+            item += n
+        if not 0 <= item < n:
+            raise IndexError("action index out of range")
+        return Action(self, item)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Action(self, i)
+
+    def __reversed__(self):
+        for i in reversed(range(len(self))):
+            yield Action(self, i)
+
+    def __eq__(self, other):
+        if not isinstance(other, (ActionLog, list)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def _player_code(self, player):
+        if player is None:
+            return 0
+        for i, p in enumerate(self.players):
+            if p is player:
+                return i + 1
+        self.players.append(player)
+        return len(self.players)
+
+    def append(self, street, player, action_type, amount, added_to_pot) -> "Action":
+        self.streets.append(_STREET_CODES[street])
+        self.player_codes.append(self._player_code(player))
+        self.action_types.append(_ACTION_TYPE_CODES[action_type])
+        self.amounts.append(amount)
+        self.added_to_pot.append(added_to_pot)
+        return Action(self, len(self) - 1)
+
+    def pop(self) -> "Action":
+        """Removes the last action, returned as a view on a copy of its row."""
+        action = self[-1:][0]
+        for column in (
+            self.streets,
+            self.player_codes,
+            self.action_types,
+            self.amounts,
+            self.added_to_pot,
+        ):
+            column.pop()
+        return action
+
+
+class Action:
+    """
+    A row of an ActionLog. It is only valid as long as the row has not been
+    removed from the log.
+    """
+
+    __slots__ = ("_index", "_log")
+
+    def __init__(self, log: ActionLog, index: int):
+        self._log = log
+        self._index = index
+
+    @property
+    def street(self) -> Union[Street, None]:
+        return _STREETS[self._log.streets[self._index]]
+
+    @property
+    def player(self) -> Union["Player", None]:
+        code = self._log.player_codes[self._index]
+        return None if code == 0 else self._log.players[code - 1]
+
+    @property
+    def action_type(self) -> Union[ActionType, None]:
+        return _ACTION_TYPES[self._log.action_types[self._index]]
+
+    @property
+    def amount(self) -> Union[Decimal, int, None]:
+        return self._log.amounts[self._index]
+
+    @property
+    def added_to_pot(self) -> Union[Decimal, int]:
+        return self._log.added_to_pot[self._index]
+
+    def _fields(self):
+        return (
+            self.street,
+            self.player,
+            self.action_type,
+            self.amount,
+            self.added_to_pot,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Action):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (
+            f"Action(street={self.street!r}, player={self.player!r}, "
+            f"action_type={self.action_type!r}, amount={self.amount!r}, "
+            f"added_to_pot={self.added_to_pot!r})"
+        )
+
+
+# returned by Player.last_action before the player has acted
+NO_ACTION = ActionLog().append(None, None, None, Decimal("0"), Decimal("0"))
+
+
+@dataclass(slots=True)
+class Player:
+    position: Position
+    hand_history: "HandHistory"
+    actions: List[Action] = field(default_factory=list)
+    stack: Decimal = Decimal("100")
+
+    initial_stack: Decimal = field(init=False)
+    _street_bets: Dict[Street, Decimal] = field(init=False)
+    _street_n_actions: Dict[Street, int] = field(init=False)
+    _invested: Decimal = field(init=False)
+    _folded: bool = field(init=False)
+
+    # Compare the running totals to a full scan of the actions on every query.
+    # Slow, only meant to be enabled for debugging.
+    check_consistency = False
+
+    def __post_init__(self):
+        self.initial_stack = self.stack
+        self._street_bets = {}
+        self._street_n_actions = {}
+        self._invested = 0
+        self._folded = False
+        for action in self.actions:
+            self._count(action, 1)
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return f"{self.position} ({self.stack})"
+
+    def __eq__(self, other):
+        return self.position == other.position
+
+    def _count(self, action, sign):
+        street = action.street
+        added = sign * action.added_to_pot
+        self._invested += added
+        self._street_n_actions[street] = self._street_n_actions.get(street, 0) + sign
+        if action.action_type == ActionType.FOLD:
+            self._folded = sign > 0
+        elif action.action_type != ActionType.ANTE:
+            self._street_bets[street] = self._street_bets.get(street, 0) + added
+
+    def _check(self, name, value, expected):
+        if value != expected:
+            raise InconsistentState(
+                f"{self.position}.{name}: running total is {value}, "
+                f"full scan gives {expected}"
+            )
+
+    def street_bet(self, street=None):
+        if street is None:
+            street = self.hand_history.current_street
+        bet = self._street_bets.get(street, 0)
+        if self.check_consistency:
+            expected = sum(
+                [
+                    a.added_to_pot
+                    for a in self.actions
+                    if a.street == street and a.action_type != ActionType.ANTE
+                ]
+            )
+            self._check(f"street_bet({street})", bet, expected)
+        return bet
+
+    def has_not_played_for_street(self, street):
+        n = self._street_n_actions.get(street, 0)
+        if self.check_consistency:
+            expected = len([a for a in self.actions if a.street == street])
+            self._check(f"has_not_played_for_street({street})", n, expected)
+        return n == 0
+
+    def has_folded(self):
+        if self.check_consistency:
+            expected = bool(self.actions) and (
+                self.actions[-1].action_type == ActionType.FOLD
+            )
+            self._check("has_folded()", self._folded, expected)
+        return self._folded
+
+    def add_action(self, action):
+        self.actions.append(action)
+        self.stack -= action.added_to_pot
+        self._count(action, 1)
+        log.debug(f"{self.position} now has {self.stack}")
+
+    def remove_last_action(self):
+        action = self.actions.pop()
+        self.stack += action.added_to_pot
+        self._count(action, -1)
+        return action
+
+    def at_action(self, cursor):
+        if cursor is None:
+            return self
+        else:
+            hh = self.hand_history.at_action(cursor)
+            return hh.get_player_by_position(self.position)
+            # return [
+            #     p
+            #     for p in .players
+            #     if p.position == self.position
+            # ][0]
+
+    def invested_in_pot(self):
+        if self.check_consistency:
+            expected = sum(a.added_to_pot for a in self.actions)
+            self._check("invested_in_pot()", self._invested, expected)
+        return self._invested
+
+    @property
+    def last_action(self):
+        if self.actions:
+            return self.actions[-1]
+        else:
+            return NO_ACTION
+
+
+@dataclass
+class LegalActions:
+    """
+    What the current player can do. Raise amounts are on top of the amount to
+    call, bounds are None when the action is not possible.
+    """
+
+    action_types: Tuple[ActionType, ...]
+    amount_to_call: Decimal
+    # what the player has already put in on this street
+    street_bet: Decimal
+    pot: Decimal
+    min_raise: Union[Decimal, None] = None
+    max_raise: Union[Decimal, None] = None
+    min_bet: Union[Decimal, None] = None
+    max_bet: Union[Decimal, None] = None
+
+
+@dataclass(frozen=True)
+class HandState:
+    """What remains of the hand once everything after an action is rewound."""
+
+    street: Street
+    current_player: Union[Position, None]
+    positions: Tuple[Position, ...]
+    stacks: Tuple[Decimal, ...]
+    n_actions: Tuple[int, ...]
+    total_pot: Decimal
+    winner: Union[Position, None]
+
+
+class HandHistory:
+    def __init__(
+        self,
+        stacks: Union[List[Decimal], None] = None,
+        small_blind: Decimal = Decimal("0.5"),
+        ante: Decimal = Decimal("0."),
+        big_blind: Union[Decimal, None] = None,
+        bb_ante: Union[Decimal, None] = None,
+        n_straddle: int = 0,
+        fixed_point_decimals: Union[int, None] = None,
+    ):
+        # With fixed_point_decimals, every amount of the hand (blinds, stacks,
+        # actions, pots...) is an int number of the smallest chip. Decimals are
+        # only used by the constructor and for serialization, see
+        # to_decimal() and from_decimal().
+        self._fixed_point = (
+            None if fixed_point_decimals is None else FixedPoint(fixed_point_decimals)
+        )
+        self._zero = self.from_decimal(Decimal(0))
+
+        small_blind = self.from_decimal(small_blind)
+        self.small_blind = small_blind
+        if big_blind is None:
+            big_blind = 2 * small_blind
+        else:
+            big_blind = self.from_decimal(big_blind)
+        self.big_blind = big_blind
+        self.actions = ActionLog()
+        self.ante = self.from_decimal(ante)
+        self.bb_ante = self.from_decimal(bb_ante)
+
+        self.players: list[Player] = []
+
+        if stacks is not None:
+            self.set_stacks(stacks)
+
+        self.current_street = Street.ANTE
+        self.current_player: Union[Player, None] = None
+        self.total_pot = self._zero
+
+        self._blinds_posted = False
+        self._legal_actions: Union[LegalActions, None] = None
+        # False for hands loaded with from_dict(trusted=True), until validate()
+        self._validated = True
+
+        self.winner: Union[Player, None] = None
+
+        self.n_straddle = n_straddle
+        self.largest_blind = 0
+
+        # _timeline[i] is the state of the hand right before actions[i]
+        self._timeline: List[HandState] = []
+        self._editable_indices: List[int] = []
+        self._states: Dict[int, HandHistory] = {}
+        # index in _timeline at which each street starts, and the side pots
+        # at that point, computed on demand
+        self._street_starts: Dict[Street, int] = {}
+        self._street_side_pots: Dict[Street, List[SidePot]] = {}
+        self._pots = SidePotLedger(self)
+
+    def set_stacks(self, stacks: List[Decimal]):
+        for stack, pos in zip(stacks, POSITIONS[len(stacks)]):
+            self.players.append(
+                Player(
+                    position=pos,
+                    stack=self.from_decimal(Decimal(stack)),
+                    hand_history=self,
+                )
+            )
+
+    @property
+    def fixed_point(self) -> Union[FixedPoint, None]:
+        return self._fixed_point
+
+    def from_decimal(self, amount: Decimal):
+        """Converts a Decimal amount to the unit used by this hand."""
+        if self._fixed_point is None or amount is None:
+            return amount
+        return self._fixed_point.to_chips(amount)
+
+    def to_decimal(self, amount) -> Decimal:
+        """Converts an amount of this hand to a Decimal."""
+        if self._fixed_point is None or amount is None:
+            return amount
+        return self._fixed_point.to_decimal(amount)
+
+    @property
+    def is_hu(self) -> bool:
+        return len(self.players) == 2
+
+    def post_blinds_and_antes(self):
+        self.current_player = self.players[0]
+        if self.ante:
+            for _ in range(len(self.players)):
+                self.add_action(ActionType.ANTE, self.ante)
+        if self.bb_ante:
+            self.add_action(ActionType.ANTE, self._zero)
+            self.add_action(ActionType.ANTE, self.bb_ante)
+            for _ in range(len(self.players) - 2):
+                self.add_action(ActionType.ANTE, self._zero)
+
+        self.current_street = Street.PRE_FLOP
+        self.add_action(ActionType.SB, min(self.small_blind, self.current_player.stack))
+        self.add_action(ActionType.BB, min(self.big_blind, self.current_player.stack))
+
+        for _ in range(self.n_straddle):
+            self.add_action(
+                ActionType.STRADDLE,
+                min(self.last_action.amount * 2, self.current_player.stack),
+            )
+
+        self.largest_blind = self.last_action.amount
+
+        self._blinds_posted = True
+        # pre-flop action starts once the blinds are in
+        self._street_starts[Street.PRE_FLOP] = len(self.actions)
+
+    def get_player_by_position(self, position: Position):
+        for p in self.players:
+            if p.position == position:
+                return p
+
+    def _non_folded_players_after_current(self):
+        start = self.players.index(self.current_player) + 1
+        players = self.players[start:] + self.players[:start]
+        players = [p for p in players if not p.has_folded()]
+        return players
+
+    def _next_player(self):
+        players = self._non_folded_players_after_current()
+        if len(players) == 1:
+            self.winner = players[0]
+            self.current_player = None
+            log.info(f"{self.winner} wins because everybody has folded")
+            return
+        to_call = self.total_amount_to_call
+        for player in players:
+            if player.stack <= 0:
+                continue
+            if (
+                self.current_street == Street.PRE_FLOP
+                and player.last_action.action_type in BLINDS
+                and to_call == self.largest_blind
+                and self.actions[-1].player != player
+            ):
+                self.current_player = player
+                break
+            if player.has_not_played_for_street(self.current_street):
+                self.current_player = player
+                break
+            if player.street_bet(self.current_street) < to_call:
+                self.current_player = player
+                break
+        else:
+            self._next_street()
+
+    def _next_street(self):
+        # HU special case
+        if self.is_hu and self.current_street == Street.PRE_FLOP:
+            self.players = self.players[::-1]
+        self.current_street = self.current_street.next()
+        if self.current_street == Street.SHOWDOWN:
+            log.info("No more action possible, showdown time")
+            self.current_player = None
+            return
+        self.current_player = self.players[-1]
+        possible_players = self._non_folded_players_after_current()
+        if sum(p.stack > 0 for p in possible_players) == 1:
+            self.current_player = None
+            self.current_street = Street.SHOWDOWN
+            return
+        self._next_player()
+
+    @property
+    def central_pot(self):
+        tot = self.total_pot
+        if self.current_street == Street.PRE_FLOP:
+            tot += sum(p.street_bet(Street.ANTE) for p in self.players)
+        # else:
+        #     tot = self.side_pots()[0].amount
+        return tot - sum(p.street_bet(self.current_street) for p in self.players)
+
+    @property
+    def total_amount_to_call(self):
+        return self._street_scan()[0]
+
+    def _street_scan(self):
+        """
+        Total amount to call and minimum raise on the current street, from a
+        single reverse scan of the actions.
+        """
+        res = 0
+        if self.current_street == Street.PRE_FLOP:
+            res += self.largest_blind
+        min_raise = None
+        # scanning the columns of the log is much faster than creating views
+        actions = self.actions
+        street = _STREET_CODES[self.current_street]
+        raise_ = _ACTION_TYPE_CODES[ActionType.RAISE]
+        bet = _ACTION_TYPE_CODES[ActionType.BET]
+        for i in reversed(range(len(actions))):
+            if actions.streets[i] != street:
+                if min_raise is None:
+                    min_raise = self.big_blind
+                break
+            action_type = actions.action_types[i]
+            if min_raise is None and action_type in _MIN_RAISE_CODES:
+                min_raise = actions.amounts[i]
+            if action_type == raise_:
+                res += actions.amounts[i]
+            if action_type == bet:
+                return res + actions.amounts[i], min_raise
+            # if a.action_type == ActionType.BET:
+            #     if all(  # everybody limps, BB bets preflop special case
+            #         (
+            #             a.street == Street.PRE_FLOP,
+            #             len(a.player.actions) > 1,
+            #             a.player.actions[-2].action_type in BLINDS,
+            #         )
+            #     ):
+            #         return res + a.amount + self.largest_blind
+            #     return res + a.amount
+            #
+            # if a.action_type in BLINDS and a.amount == self.largest_blind:
+            #     res += a.amount
+        if self.current_street == Street.PRE_FLOP:
+            res = max(res, self.largest_blind)
+        return res, min_raise
+
+    @property
+    def last_action(self):
+        if self.actions:
+            return self.actions[-1]
+
+    def possible_action_types(self):
+        return list(self.legal_actions().action_types)
+
+    def legal_actions(self) -> "LegalActions":
+        """What the current player can do, cached until the next state change."""
+        if self._legal_actions is None:
+            self._legal_actions = self._compute_legal_actions()
+        return self._legal_actions
+
+    def _compute_legal_actions(self):
+        player = self.current_player
+        if player is None:
+            return LegalActions(
+                action_types=(),
+                amount_to_call=self._zero,
+                street_bet=self._zero,
+                pot=self.total_pot,
+            )
+        total_to_call, min_raise = self._street_scan()
+        street_bet = player.street_bet(self.current_street)
+        to_call = min(total_to_call - street_bet, player.stack)
+        actions = [ActionType.FOLD]
+        if to_call == 0:
+            actions.append(ActionType.RAISE)
+            actions.append(ActionType.BET)
+            actions.append(ActionType.CHECK)
+        else:
+            actions.append(ActionType.CALL)
+            # min_raise is None before the blinds are posted
+            if min_raise is not None and player.stack > max(to_call, min_raise):
+                actions.append(ActionType.RAISE)
+        legal = LegalActions(
+            action_types=tuple(actions),
+            amount_to_call=to_call,
+            street_bet=street_bet,
+            pot=self.total_pot,
+        )
+        if ActionType.RAISE in actions:
+            legal.min_raise = min_raise
+            legal.max_raise = player.stack - to_call
+        if ActionType.BET in actions:
+            legal.min_bet = self.big_blind
+            legal.max_bet = player.stack
+        return legal
+
+    def add_action(self, action_type: ActionType, amount: Union[None, Decimal] = None):
+        if self._blinds_posted and action_type not in self.possible_action_types():
+            raise InvalidAction
+        if action_type == ActionType.BET and amount < self.big_blind:
+            raise InvalidAmount("Bet is less than BB")
+        if action_type == ActionType.RAISE and amount < self.minimum_raise():
+            raise InvalidAmount("Raise is too small")
+
+        amount, added_to_pot = self._amounts(action_type, amount)
+        if added_to_pot > self.current_player.stack:
+            raise InvalidAmount
+
+        self._record_action(action_type, amount, added_to_pot)
+
+    def _amounts(self, action_type, amount):
+        """The amount to record for an action, and the amount it adds to the pot."""
+        if action_type == ActionType.CALL:
+            added_to_pot = self.current_player_amount_to_call()
+            return added_to_pot, added_to_pot
+        if action_type == ActionType.RAISE:
+            return amount, amount + self.current_player_amount_to_call()
+        if action_type in (ActionType.BET, ActionType.ANTE, *BLINDS):
+            return amount, amount
+        return amount, self._zero
+
+    def _record_action(self, action_type, amount, added_to_pot):
+        if log.isEnabledFor(logging.INFO):
+            log.info(
+                f"Action #{len(self.actions) + 1} ({self.current_street}): "
+                f"{self.current_player}: {action_type}, "
+                f"amount={amount}, added_to_pot={added_to_pot}, "
+            )
+
+        self._legal_actions = None
+        self._timeline.append(self._snapshot())
+        self._street_starts.setdefault(self.current_street, len(self.actions))
+        if action_type not in NOT_EDITABLE:
+            self._editable_indices.append(len(self.actions))
+        action = self.actions.append(
+            self.current_street, self.current_player, action_type, amount, added_to_pot
+        )
+        self.current_player.add_action(action)
+        self._pots.update(self.current_player)
+
+        self.total_pot += added_to_pot
+
+        self._next_player()
+        self._street_starts.setdefault(self.current_street, len(self.actions))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                f"Total amount to call: {self.total_amount_to_call}, "
+                f"total pot:{self.total_pot}, central_pot:{self.central_pot}, "
+                f"side_pots: {self.side_pots()}, current_street:{self.current_street}"
+            )
+
+    def remove_last_action(self):
+        self.actions[-1].player.remove_last_action()
+        action = self.actions.pop()
+        self._pots.update(action.player)
+        self.total_pot -= action.added_to_pot
+        self.current_player = action.player
+        self.current_street = action.street
+        self.winner = None
+        self._legal_actions = None
+
+        n = len(self.actions)
+        self._timeline.pop()
+        if self._editable_indices and self._editable_indices[-1] == n:
+            self._editable_indices.pop()
+        for k in [k for k in self._states if k >= n]:
+            del self._states[k]
+        for street in [s for s, i in self._street_starts.items() if i > n]:
+            del self._street_starts[street]
+            self._street_side_pots.pop(street, None)
+
+    def _snapshot(self):
+        return HandState(
+            street=self.current_street,
+            current_player=(
+                None if self.current_player is None else self.current_player.position
+            ),
+            positions=tuple(p.position for p in self.players),
+            stacks=tuple(p.stack for p in self.players),
+            n_actions=tuple(len(p.actions) for p in self.players),
+            total_pot=self.total_pot,
+            winner=None if self.winner is None else self.winner.position,
+        )
+
+    def _state_at(self, n_actions):
+        """
+        Read-only view of the hand as it was after its first n_actions actions.
+
+        Views are built from the recorded snapshots, their players sharing the
+        Action views of this hand, and are cached until the actions they rely
+        on are removed.
+        """
+        if n_actions >= len(self.actions):
+            return self
+        try:
+            return self._states[n_actions]
+        except KeyError:
+            pass
+
+        state = self._timeline[n_actions]
+        view = copy(self)
+        view.actions = self.actions[:n_actions]
+        view.players = []
+        for position, stack, n in zip(state.positions, state.stacks, state.n_actions):
+            player = self.get_player_by_position(position)
+            view_player = Player(
+                position=position,
+                hand_history=view,
+                actions=player.actions[:n],
+                stack=stack,
+            )
+            view_player.initial_stack = player.initial_stack
+            view.players.append(view_player)
+        view._pots = SidePotLedger(view)
+        for view_player in view.players:
+            view._pots.update(view_player)
+        view.current_street = state.street
+        view.current_player = view.get_player_by_position(state.current_player)
+        view.winner = view.get_player_by_position(state.winner)
+        view.total_pot = state.total_pot
+        view._timeline = self._timeline[:n_actions]
+        view._editable_indices = [i for i in self._editable_indices if i < n_actions]
+        view._states = {}
+        view._legal_actions = None
+        view._street_starts = {
+            s: i for s, i in self._street_starts.items() if i <= n_actions
+        }
+        view._street_side_pots = {
+            s: p for s, p in self._street_side_pots.items() if s in view._street_starts
+        }
+
+        self._states[n_actions] = view
+        return view
+
+    def current_player_street_bet(self):
+        return self.current_player.street_bet(self.current_street)
+
+    def current_player_amount_to_call(self):
+        if self._legal_actions is not None:
+            return self._legal_actions.amount_to_call
+        return min(
+            self.total_amount_to_call - self.current_player_street_bet(),
+            self.current_player.stack,
+        )
+
+    def has_editable_actions(self):
+        return len(self.editable_actions()) > 0
+
+    def minimum_raise(self):
+        return self._street_scan()[1]
+
+    def editable_actions(self):
+        return [self.actions[i] for i in self._editable_indices]
+
+    def at_action(self, cursor):
+        if cursor is None:
+            return self
+        if cursor == -1:
+            return self._state_at(0)
+        if cursor < len(self._editable_indices):
+            return self._state_at(self._editable_indices[cursor])
+        return self._state_at(len(self.actions))
+
+    def at_street_start(self, street=None):
+        if street is None:
+            street = self.current_street
+        try:
+            return self._state_at(self._street_starts[street])
+        except KeyError:
+            return self
+
+    def side_pots(self, at_street_begin=False):
+        if at_street_begin:
+            street = self.current_street
+            try:
+                return self._street_side_pots[street]
+            except KeyError:
+                pass
+            side_pots = self.at_street_start(street).side_pots()
+            if street in self._street_starts:
+                self._street_side_pots[street] = side_pots
+            return side_pots
+        return self._pots.side_pots()
+
+    @classmethod
+    def from_dict(cls, obj, fixed_point=False, trusted=False):
+        """
+        Builds a hand from its serialized form.
+
+        With trusted=True, e.g. for files written by this app, the recorded
+        actions are not checked against the rules: they are replayed in one
+        pass and validate() can be called later if needed.
+        """
+        amounts = {k: obj[k] for k in ("ante", "big_blind", "small_blind", "bb_ante")}
+        if fixed_point:
+            n_decimals = amount_decimals(
+                *amounts.values(),
+                *obj["players"],
+                *(a["amount"] for a in obj["actions"]),
+            )
+        else:
+            n_decimals = None
+        hh = cls(
+            n_straddle=obj["n_straddle"], fixed_point_decimals=n_decimals, **amounts
+        )
+        hh.set_stacks(obj["players"])
+        hh.post_blinds_and_antes()
+        for action in obj["actions"]:
+            action_type = ActionType(action["type"])
+            if action_type in BLINDS + [ActionType.ANTE]:
+                continue
+            amount = hh.from_decimal(action["amount"])
+            if trusted:
+                hh._record_action(action_type, *hh._amounts(action_type, amount))
+            else:
+                hh.add_action(action_type, amount)
+        if hh.is_hu and hh.players[0].position == Position.BB:
+            hh.players = hh.players[::-1]
+        hh._validated = not trusted
+        return hh
+
+    def validate(self):
+        """
+        Checks the actions of a hand loaded with from_dict(trusted=True) by
+        replaying them through add_action, which raises HandHistoryException
+        if one of them is not allowed.
+        """
+        if not self._validated:
+            HandHistory.from_dict(self.to_dict())
+            self._validated = True
+
+    def to_json(self):
+        return codec.dumps(self.to_dict())
+
+    def to_dict(self):
+        return codec.hand_to_dict(self)
+
+    @classmethod
+    def from_json(cls, string):
+        return cls.from_dict(codec.loads(string))
+
+    def n_pseudo_actions(self):
+        # used by replayer to delay apparition of turn and river
+        if self.last_action is None:
+            return 0
+        return Street.RIVER - self.last_action.street
+
+    def play_length(self):
+        return 2 + len(self.editable_actions()) + self.n_pseudo_actions()
+
+
+@dataclass
+class SidePotPlayer:
+    position: Position
+    investment: Decimal
+    live: bool = True
+
+
+@dataclass
+class SidePot:
+    players: List[SidePotPlayer]
+    amount: Decimal
+    folded: List[SidePotPlayer]
+
+    def get_player_by_position(self, position: Position):
+        for p in self.players:
+            if p.position == position:
+                return p
+
+    def contributors(self):
+        return self.players + self.folded
+
+
+class SidePotLedger:
+    """
+    Keeps the players' investments sorted, so that side pots are computed in
+    a single sweep over increasing investment levels.
+
+    The BB ante is dead money that always goes to the main pot, whatever
+    happens to the BB afterwards.
+    """
+
+    def __init__(self, hand_history: "HandHistory"):
+        self.hand_history = hand_history
+        self._entries: List[Tuple[Decimal, Position, bool]] = []
+        self._entry_of: Dict[Position, Tuple[Decimal, Position, bool]] = {}
+        self._dead_ante = 0
+        self._side_pots: Union[List[SidePot], None] = None
+
+    def update(self, player: Player):
+        invested = player.invested_in_pot()
+        if player.position == Position.BB and self.hand_history.bb_ante:
+            self._dead_ante = min(self.hand_history.bb_ante, invested)
+            invested -= self._dead_ante
+        entry = (invested, player.position, not player.has_folded())
+
+        old = self._entry_of.get(player.position)
+        if old == entry:
+            return
+        if old is not None:
+            del self._entries[bisect_left(self._entries, old)]
+        insort(self._entries, entry)
+        self._entry_of[player.position] = entry
+        self._side_pots = None
+
+    def side_pots(self) -> List[SidePot]:
+        if self._side_pots is None:
+            self._side_pots = self._sweep()
+        return list(self._side_pots)
+
+    def _sweep(self):
+        live = [(i, pos) for i, pos, is_live in self._entries if is_live]
+        dead = [(i, pos) for i, pos, is_live in self._entries if not is_live and i]
+        top = live[-1][0] if live else 0
+
+        side_pots = []
+        level = 0
+        for k, (investment, _) in enumerate(live):
+            if investment <= level:
+                continue
+            width = investment - level
+            players = [SidePotPlayer(pos, width, True) for _, pos in live[k:]]
+            amount = width * len(players)
+            if not side_pots and (self._dead_ante or dead):
+                # all-in for the BB ante, still contesting the dead money
+                players[:0] = [SidePotPlayer(pos, 0, True) for _, pos in live[:k]]
+            folded = []
+            for dead_investment, pos in dead:
+                removed = dead_investment - level
+                # chips folded above the largest live investment can only be
+                # won by the players contesting the last pot
+                if investment < top:
+                    removed = min(width, removed)
+                if removed > 0:
+                    folded.append(SidePotPlayer(pos, removed, False))
+                    amount += removed
+            side_pots.append(SidePot(players=players, amount=amount, folded=folded))
+            level = investment
+
+        if not side_pots and (self._dead_ante or dead):
+            folded = [SidePotPlayer(pos, i, False) for i, pos in dead]
+            side_pots.append(
+                SidePot(
+                    players=[SidePotPlayer(pos, 0, True) for _, pos in live],
+                    amount=sum(p.investment for p in folded),
+                    folded=folded,
+                )
+            )
+
+        if side_pots:
+            side_pots[0].amount += self._dead_ante
+        return side_pots
+
+
+# def str_list(list_):
+#     return "\n".join(str(el) for el in list_)
+
+
+def test():
+    logging.basicConfig(level=logging.DEBUG)
+    hh = HandHistory(
+        stacks=[Decimal(10), Decimal(50), Decimal(10), Decimal(10)],
+        small_blind=Decimal("0.5"),
+        big_blind=Decimal(1),
+        # ante=Decimal("0.1"),
+    )
+    hh.post_blinds_and_antes()
+    print(hh.side_pots())
+    # hh.add_action(ActionType.RAISE, Decimal(49))
+    # hh.add_action(ActionType.RAISE, Decimal(1))
+    print(hh.possible_action_types())
+    # hh.add_action(ActionType.BET, Decimal(2))
+    # hh.add_action(ActionType.RAISE, Decimal(2))
+
+    # hh = HandHistory(
+    #     stacks=[
+    #         Decimal(100),
+    #         # Decimal(100),
+    #         # Decimal(100),
+    #         Decimal(100),
+    #     ],
+    #     small_blind=Decimal("0.5"),
+    #     big_blind=Decimal(1),
+    #     # n_straddle=2
+    #     # ante=Decimal("0.2"),
+    # )
+    # hh.post_blinds_and_antes()
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.BET, Decimal(1))
+    # hh.set_stacks()
+    # hh.post_blinds_and_antes()
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.BET, Decimal(5))
+    #
+    # from pprint import pprint
+    #
+    # # pprint(hh.serialize())
+    #
+    # d = json.loads(json.dumps(hh, cls=HHJSONEncoder), object_hook=json_hook)
+    # pprint(d)
+    #
+    # logging.basicConfig(level=logging.DEBUG)
+    #
+    # hh = HandHistory.from_dict(d)
+
+    # hh.add_action(ActionType.RAISE, Decimal(99))
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.CALL)
+
+    # hh.add_action(ActionType.FOLD)
+    # hh.add_action(ActionType.RAISE, Decimal(9))
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.FOLD)
+
+    # print(hh.possible_action_types())
+    # print(hh.current_street)
+    # print(hh.current_player)
+    # print(hh.minimum_raise())
+    # hh.add_action(ActionType.RAISE, hh.minimum_raise())
+    # hh.add_action(ActionType.RAISE, hh.minimum_raise())
+    # hh.add_action(ActionType.RAISE, hh.minimum_raise())
+    # hh.add_action(ActionType.RAISE, hh.minimum_raise())
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.CHECK, hh.minimum_raise())
+    # hh.add_action(ActionType.BET, Decimal("5.42"))
+    # hh.add_action(ActionType.FOLD)
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.RAISE, hh.minimum_raise())
+    # hh.add_action(ActionType.RAISE, hh.minimum_raise())
+    # hh.add_action(ActionType.RAISE, hh.minimum_raise())
+    # hh.add_action(ActionType.RAISE, hh.minimum_raise())
+    # hh.add_action(ActionType.CALL)
+    # hh.add_action(ActionType.CALL)
+    # print(hh.players)
+
+
+log = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,265 @@
+"""
+The replay of a hand history, compiled into a flat list of frames.
+
+A frame is what the table shows after a click on Next: the state of the hand,
+the cards of the board, whether the bets are collected, the hands shown and the
+pots given to the winners. It also says what Next plays to reach it from the
+frame before, and the sound that goes with it. Next, Back, Start and seeking
+are then moves of an index in the list.
+
+The amounts shown by the table at a frame, once its animations are over, are
+its values: seeking sets the table to them directly.
+
+precompile_replay() does all the work on a copy of the hand, so that it can run
+in a worker thread while the table shows the first frame.
+"""
+
+import logging
+from dataclasses import dataclass
+from decimal import Decimal
+from enum import Enum
+from functools import cached_property
+from typing import Dict, List, Tuple, Union
+
+from . import evaluator
+from .enums import ActionType
+from .hh import HandHistory, Position, Street
+
+
+class Step(Enum):
+    # the hand history at an action, the board left as it is
+    SYNC = "sync"
+    SHOW_FLOP = "show_flop"
+    SHOW_TURN = "show_turn"
+    SHOW_RIVER = "show_river"
+    COLLECT_BETS = "collect_bets"
+    SHOW_HANDS = "show_hands"
+    PAY_WINNERS = "pay_winners"
+
+
+BOARD_STEPS = {
+    Street.FLOP: Step.SHOW_FLOP,
+    Street.TURN: Step.SHOW_TURN,
+    Street.RIVER: Step.SHOW_RIVER,
+}
+
+# the board cards wait for a click on Next when these streets begin
+WAITING_STREETS = {Street.FLOP, Street.TURN, Street.RIVER}
+
+
+@dataclass(frozen=True)
+class SeatValues:
+    bet: Decimal
+    stack: Decimal
+    folded: bool
+
+
+@dataclass(frozen=True)
+class TableValues:
+    # central pot first, then the side pots
+    pots: Tuple[Decimal, ...]
+    total_pot: Decimal
+    pot_odds: Decimal
+    seats: Dict[Position, SeatValues]
+    current_player: Union[None, Position]
+
+
+@dataclass(frozen=True)
+class ReplayFrame:
+    hand_history: HandHistory
+    # the last street whose cards are on the board
+    board: Street
+    # played by Next from the frame before
+    steps: Tuple[Step, ...] = ()
+    # key of util.sounds
+    sound: Union[None, ActionType, str] = None
+    bets_collected: bool = False
+    hands_shown: bool = False
+    winners_paid: bool = False
+    # per pot, the positions sharing it at the showdown, None when a hand is
+    # unknown; not evaluated yet if None
+    winners: Union[None, Tuple[Union[None, Tuple[Position, ...]], ...]] = None
+
+    @cached_property
+    def values(self) -> TableValues:
+        """The amounts on the table, before the winners are paid."""
+        hand_history = self.hand_history
+        pots = street_begin_pots(hand_history)
+        if self.bets_collected:
+            collected = [p.amount for p in hand_history.side_pots()]
+            pots = collected + pots[len(collected) :]
+        seats = {
+            p.position: SeatValues(
+                bet=0 if self.bets_collected else p.street_bet(),
+                stack=p.stack,
+                folded=p.last_action.action_type == ActionType.FOLD,
+            )
+            for p in hand_history.players
+        }
+        current_player = hand_history.current_player
+        return TableValues(
+            pots=tuple(pots),
+            total_pot=total_pot_shown(hand_history),
+            pot_odds=pot_odds(hand_history),
+            seats=seats,
+            current_player=None if current_player is None else current_player.position,
+        )
+
+
+def street_begin_pots(hand_history: HandHistory) -> List[Decimal]:
+    """The central and side pots, without the bets of the current street."""
+    if hand_history.current_street == Street.PRE_FLOP:
+        return [hand_history.central_pot if hand_history.ante else 0]
+    return [p.amount for p in hand_history.side_pots(at_street_begin=True)]
+
+
+def total_pot_shown(hand_history: HandHistory):
+    """The total pot, shown when it differs from the central pot only."""
+    if hand_history.central_pot != hand_history.total_pot:
+        return hand_history.total_pot
+    return 0
+
+
+def pot_odds(hand_history: HandHistory):
+    """The pot odds of the current player, 0 when there is nothing to call."""
+    if hand_history.current_player is None:
+        return 0
+    to_call = hand_history.current_player_amount_to_call()
+    if to_call == 0:
+        return 0
+    try:
+        diff = min(
+            abs(
+                hand_history.current_player.initial_stack
+                - hand_history.actions[-1].player.initial_stack
+            ),
+            0,
+        )
+    except IndexError:
+        return 0
+    return (hand_history.total_pot - diff) / to_call
+
+
+def compile_replay(
+    hand_history: HandHistory,
+    hands: Union[None, Dict[Position, List[str]]] = None,
+    board: Union[None, List[str]] = None,
+) -> List[ReplayFrame]:
+    """
+    The frames of the replay of hand_history, the first one before any action.
+
+    With the cards of the players and of the board, in deuces format, the last
+    frame has the winners of the showdown.
+    """
+    previous = hand_history.at_action(-1)
+    frames = [ReplayFrame(previous, board=Street.PRE_FLOP)]
+
+    # the actions, with a frame for the board when a street begins
+    for cursor in range(len(hand_history.editable_actions()) + 1):
+        state = hand_history.at_action(cursor)
+        street = state.current_street
+        next_street = previous.current_street < street
+        frames.append(
+            ReplayFrame(
+                state,
+                board=frames[-1].board,
+                steps=(Step.SYNC,),
+                sound=_action_sound(state, next_street),
+            )
+        )
+        if next_street and street in WAITING_STREETS:
+            frames.append(
+                ReplayFrame(
+                    state, board=street, steps=(BOARD_STEPS[street],), sound="street"
+                )
+            )
+        previous = state
+
+    # the bets go to the pots, then the rest of the board is dealt one street
+    # at a time before the showdown
+    last_street = hand_history.last_action.street
+    streets_left = [s for s in BOARD_STEPS if s > last_street]
+    board_street = frames[-1].board
+    steps = [Step.COLLECT_BETS]
+    for street in streets_left:
+        board_street = street
+        steps.append(BOARD_STEPS[street])
+        frames.append(
+            ReplayFrame(
+                hand_history,
+                board=board_street,
+                steps=tuple(steps),
+                sound="street",
+                bets_collected=True,
+            )
+        )
+        steps = []
+    steps.append(Step.SHOW_HANDS)
+    frames.append(
+        ReplayFrame(
+            hand_history,
+            board=board_street,
+            steps=tuple(steps),
+            bets_collected=True,
+            hands_shown=True,
+        )
+    )
+    winners = None
+    if hands is not None and hand_history.winner is None:
+        winners = showdown_winners(hand_history, hands, board)
+    frames.append(
+        ReplayFrame(
+            hand_history,
+            board=board_street,
+            steps=(Step.PAY_WINNERS,),
+            bets_collected=True,
+            hands_shown=True,
+            winners_paid=True,
+            winners=winners,
+        )
+    )
+    log.debug(f"Compiled a replay of {len(frames)} frames")
+    return frames
+
+
+def precompile_replay(
+    hand_dict: dict, hands: Dict[Position, List[str]], board: List[str]
+) -> List[ReplayFrame]:
+    """
+    compile_replay() for the hand serialized as hand_dict, with the values of
+    the frames computed. Nothing is shared with the hand it comes from.
+    """
+    hand_history = HandHistory.from_dict(hand_dict, trusted=True)
+    frames = compile_replay(hand_history, hands, board)
+    for frame in frames:
+        # computed once, cached by the frame
+        _ = frame.values
+    return frames
+
+
+def showdown_winners(
+    hand_history: HandHistory, hands: Dict[Position, List[str]], board: List[str]
+) -> Tuple[Union[None, Tuple[Position, ...]], ...]:
+    """Per pot, the positions sharing it, None when a card is unknown."""
+    winners = []
+    for side_pot in hand_history.side_pots():
+        positions = [p.position for p in side_pot.players]
+        try:
+            indices = evaluator.winners([hands[p] for p in positions], board)
+        except KeyError:
+            winners.append(None)
+            continue
+        winners.append(tuple(positions[i] for i in indices))
+    return tuple(winners)
+
+
+def _action_sound(state: HandHistory, next_street):
+    last_action = state.last_action
+    if last_action is None:
+        return None
+    if next_street and last_action.action_type == ActionType.CALL:
+        return "call_closing"
+    return last_action.action_type
+
+
+log = logging.getLogger(__name__)
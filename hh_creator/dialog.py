@@ -6,8 +6,10 @@ from decimal import Decimal
 from PyQt5 import QtCore, QtWidgets
 from PyQt5.QtCore import pyqtSlot
 
-from . import config, hh
-from .util import AutoUI, amount_validator, decimal_conversion
+from . import config
+from .core import hh
+from .core.amounts import amount_decimals, decimal_conversion
+from .util import AutoUI, amount_validator
 
 if typing.TYPE_CHECKING:
     from .player import PlayerItemGroup
@@ -64,9 +66,7 @@ class NewHandDialog(QtWidgets.QDialog, AutoUI):
     def _auto_decimals(self):
         sb = self.get_field_value("SB", Decimal())
         ante = self.get_field_value("Ante", Decimal())
-        self._get_widget("Decimals").setText(
-            str(max(-sb.as_tuple().exponent, -ante.as_tuple().exponent, 1))
-        )
+        self._get_widget("Decimals").setText(str(amount_decimals(sb, ante)))
 
     def _auto_sb(self):
         self._get_widget("SB").setText(str(self.get_field_value("BB") / 2))
@@ -0,0 +1,272 @@
+"""
+Offscreen export of a replay, frame by frame.
+
+The replay is played as with the Next button, on a clock ticked by hand: every
+step is followed by a fixed duration of video, rendered at the requested frame
+rate as fast as the CPU allows. Frames are written as numbered PNG files, or as a
+Y4M stream (a file, or "-" for the standard output) that ffmpeg can encode:
+
+    python -m hh_creator.export hand.hh - | ffmpeg -i - hand.mp4
+"""
+
+import logging
+import os
+import sys
+import time
+from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from . import config, render_profile
+
+
+@dataclass
+class ExportSettings:
+    width: int = config.config["export"].getint("width")
+    height: int = config.config["export"].getint("height")
+    fps: int = config.config["export"].getint("fps")
+    # milliseconds of video after each step of the replay
+    step_duration: int = config.config["export"].getint("step_duration")
+
+
+class PngSequence:
+    """Frames compressed and written by worker threads, while the next render."""
+
+    # zlib level 1: the default level makes writing 3 times slower, for files
+    # only 20% smaller
+    QUALITY = 80
+
+    def __init__(self, directory, n_threads=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.n_frames = 0
+        self.n_threads = n_threads or os.cpu_count()
+        self._executor = ThreadPoolExecutor(self.n_threads)
+        self._pending = deque()
+
+    def write(self, image: QtGui.QImage):
+        filename = self.directory / f"frame-{self.n_frames:06d}.png"
+        self._pending.append(self._executor.submit(self._save, image.copy(), filename))
+        self.n_frames += 1
+        # bounds the memory used by the frames waiting to be written
+        while len(self._pending) > 2 * self.n_threads:
+            self._pending.popleft().result()
+
+    def _save(self, image, filename):
+        if not image.save(str(filename), None, self.QUALITY):
+            raise OSError(f"Cannot write {filename}")
+
+    def close(self):
+        while self._pending:
+            self._pending.popleft().result()
+        self._executor.shutdown()
+
+
+class Y4mStream:
+    """
+    Frames as 8-bit YUV 4:2:0 (BT.601, limited range), which needs numpy. With
+    owns_fp, fp is closed with the stream.
+    """
+
+    def __init__(self, fp, settings: ExportSettings, owns_fp=False):
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError(
+                "Y4M export needs numpy: pip install hh-creator[video]"
+            ) from e
+        if settings.width % 2 or settings.height % 2:
+            raise ValueError("Y4M export needs an even width and height")
+        self._np = numpy
+        self.fp = fp
+        self.owns_fp = owns_fp
+        self.n_frames = 0
+        fp.write(
+            f"YUV4MPEG2 W{settings.width} H{settings.height} F{settings.fps}:1 "
+            "Ip A1:1 C420jpeg\n".encode()
+        )
+
+    def write(self, image: QtGui.QImage):
+        np = self._np
+        image = image.convertToFormat(QtGui.QImage.Format_RGB888)
+        w, h = image.width(), image.height()
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        rgb = np.frombuffer(bits, np.uint8).reshape(h, image.bytesPerLine())
+        rgb = rgb[:, : w * 3].reshape(h, w, 3).astype(np.float32)
+        r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+
+        y = 16 + (65.481 * r + 128.553 * g + 24.966 * b) / 255
+        cb = 128 + (-37.797 * r - 74.203 * g + 112.0 * b) / 255
+        cr = 128 + (112.0 * r - 93.786 * g - 18.214 * b) / 255
+        self.fp.write(b"FRAME\n")
+        for plane in y, self._subsample(cb), self._subsample(cr):
+            self.fp.write(np.rint(plane).astype(np.uint8).tobytes())
+        self.n_frames += 1
+
+    @staticmethod
+    def _subsample(plane):
+        return (
+            plane[0::2, 0::2]
+            + plane[1::2, 0::2]
+            + plane[0::2, 1::2]
+            + plane[1::2, 1::2]
+        ) / 4
+
+    def close(self):
+        if self.owns_fp:
+            self.fp.close()
+        else:
+            self.fp.flush()
+
+
+class Exporter:
+    def __init__(self, main_window, settings: ExportSettings):
+        self.main_window = main_window
+        self.settings = settings
+        self.scene = main_window.scene
+        self.profile = render_profile.get("export")
+        self.frame_timer = render_profile.FrameTimer(self.profile.name)
+        self._n_frames = 0
+        self._image = QtGui.QImage(
+            settings.width, settings.height, QtGui.QImage.Format_RGB32
+        )
+
+    def export(self, filename, writer, progress=None):
+        """
+        Writes the frames of the replay of a hand history file, calling
+        progress(n_steps, n_frames) after each step.
+        """
+        mw = self.main_window
+        # the clock of this scene only, the others keep playing
+        clock = self.scene.animations.clock
+        clock.set_manual()
+        try:
+            mw.load_hh(filename)
+            mw.wait_for_replay()
+            render_profile.set_pixmap_cache_limit()
+            self.scene.set_cache_mode(self.profile.cache_mode)
+            # the views would repaint at every step for nothing
+            if mw.full_screen_widget is not None:
+                mw.full_screen_widget.hide()
+            mw.hide()
+
+            n_steps = 0
+            next_ = mw.widgets["pushButtonNext"]
+            while True:
+                self._play(writer)
+                n_steps += 1
+                if progress is not None:
+                    progress(n_steps, writer.n_frames)
+                if not next_.isEnabled():
+                    break
+                mw.on_pushButtonNext_clicked()
+        finally:
+            clock.set_manual(False)
+            self.scene.set_cache_mode(mw.render_profile.cache_mode)
+            writer.close()
+        log.info(f"Exported {writer.n_frames} frames")
+        self.frame_timer.report()
+
+    def _play(self, writer):
+        """Renders a step, ticking the clock of its animations and timers."""
+        for _ in range(self._frames_per_step()):
+            now = self._n_frames * 1000 // self.settings.fps
+            clock = self.scene.animations.clock
+            clock.tick(now - clock.now)
+            start = time.perf_counter()
+            image = self.render()
+            self.frame_timer.add((time.perf_counter() - start) * 1000)
+            writer.write(image)
+            self._n_frames += 1
+
+    def _frames_per_step(self):
+        return max(1, self.settings.step_duration * self.settings.fps // 1000)
+
+    def render(self) -> QtGui.QImage:
+        image = self._image
+        image.fill(QtCore.Qt.black)
+        painter = QtGui.QPainter(image)
+        painter.setRenderHints(self.profile.render_hints)
+        self.scene.render(
+            painter,
+            QtCore.QRectF(image.rect()),
+            self.scene.sceneRect(),
+            QtCore.Qt.KeepAspectRatio,
+        )
+        painter.end()
+        return image
+
+
+def open_writer(output, settings: ExportSettings, n_threads=None):
+    """
+    A Y4M stream for "-" or a .y4m file, PNG files in a directory otherwise,
+    written by n_threads threads (one per CPU by default).
+    """
+    if output == "-":
+        return Y4mStream(sys.stdout.buffer, settings)
+    if Path(output).suffix.lower() == ".y4m":
+        with ExitStack() as stack:
+            fp = stack.enter_context(open(output, "wb"))
+            writer = Y4mStream(fp, settings, owns_fp=True)
+            # closed by the writer from now on
+            stack.pop_all()
+            return writer
+    return PngSequence(output, n_threads)
+
+
+def add_arguments(parser: ArgumentParser):
+    defaults = ExportSettings()
+    parser.add_argument(
+        "--size",
+        default=f"{defaults.width}x{defaults.height}",
+        help="resolution of the frames, as WIDTHxHEIGHT",
+    )
+    parser.add_argument("--fps", type=int, default=defaults.fps)
+    parser.add_argument(
+        "--step-duration",
+        type=int,
+        default=defaults.step_duration,
+        help="milliseconds of video after each step of the replay",
+    )
+
+
+def settings_from_args(args) -> ExportSettings:
+    width, height = (int(x) for x in args.size.lower().split("x"))
+    return ExportSettings(
+        width=width, height=height, fps=args.fps, step_duration=args.step_duration
+    )
+
+
+def main():
+    parser = ArgumentParser(description="Export the replay of a hand as frames")
+    parser.add_argument("hand", help="HH file")
+    parser.add_argument(
+        "output",
+        help="directory for PNG files, .y4m file, or - for a Y4M stream on stdout",
+    )
+    add_arguments(parser)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QtWidgets.QApplication(sys.argv[:1])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    from .main_window import MainWindow
+    from .util import init_sounds
+
+    init_sounds(muted=True)
+    settings = settings_from_args(args)
+    writer = open_writer(args.output, settings)
+    Exporter(MainWindow(show_new_hh_dialog=False), settings).export(args.hand, writer)
+    app.quit()
+
+
+log = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,23 @@
-import json
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Union
+from typing import ClassVar, Dict, List, Union
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import pyqtSlot
 from PyQt5.QtWidgets import QMessageBox
 
-from . import config
-from .animations import Animations
+from . import config, render_profile
 from .card import CardLook
+from .core import codec
+from .core.enums import IncrementableEnum
+from .core.hh import HandHistory, Street
+from .core.replay import ReplayFrame, Step, compile_replay, precompile_replay
 from .dialog import NewHandDialog
-from .hh import HandHistory, HHJSONEncoder, Street, json_hook
 from .scene import TableScene
+from .scene_state import frame_state
 from .text import TextItem
-from .util import AutoUI, IncrementableEnum, sounds
+from .util import AutoUI, Image, sounds
 
 
 class KeyboardShortcutsMixin:
@@ -53,6 +56,21 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
         State.WAIT_FOR_TURN: "Suivant = afficher turn",
         State.WAIT_FOR_RIVER: "Suivant = afficher river",
     }
+    REPLAY_STATES = (
+        State.REPLAY,
+        State.WAIT_FOR_FLOP,
+        State.WAIT_FOR_TURN,
+        State.WAIT_FOR_RIVER,
+    )
+    # the state waiting for the click showing the cards of a street
+    WAIT_STATES: ClassVar[Dict[Step, State]] = {
+        Step.SHOW_FLOP: State.WAIT_FOR_FLOP,
+        Step.SHOW_TURN: State.WAIT_FOR_TURN,
+        Step.SHOW_RIVER: State.WAIT_FOR_RIVER,
+    }
+    # compiles the replays one at a time, off the GUI thread
+    _executor: Union[None, ThreadPoolExecutor] = None
+    replay_compiled = QtCore.pyqtSignal(object)
 
     def __init__(self, show_new_hh_dialog: bool = True):
         super().__init__()
@@ -67,13 +85,30 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
         self.hand_history: Union[None, HandHistory] = None
         self.hh_settings = {}
 
-        if config.config["behavior"].getboolean("replay_start_with_blinds_posted"):
-            self.replay_action_cursor = 1
-        else:
-            self.replay_action_cursor = 0
+        # compiled when the replay starts, again after an edition; only the
+        # first frame until the worker is done
+        self.replay_frames: Union[None, List[ReplayFrame]] = None
+        self.replay_index = 0
+        self._replay_job: Union[None, Future] = None
+        self.replay_compiled.connect(self._on_replay_compiled)
 
         self.actionOpenGL.setChecked(config.config["animation"].getboolean("opengl"))
+        self.speed_actions = {
+            0: self.actionSpeedSkip,
+            1: self.actionSpeedNormal,
+            2: self.actionSpeedDouble,
+            10: self.actionSpeedFast,
+        }
+        speed_group = QtWidgets.QActionGroup(self)
+        for action in self.speed_actions.values():
+            speed_group.addAction(action)
+        try:
+            time_scale = config.config["animation"].getfloat("time_scale")
+            self.speed_actions[time_scale].setChecked(True)
+        except KeyError:  # another speed set in the config file
+            pass
 
+        self.render_profile = render_profile.get("window")
         self._make_table_scene()
         self.show()
         if config.geometry is not None:
@@ -85,6 +120,7 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
 
         self.current_filename = None
         self.update_background()
+        self._prefetch_looks()
         if show_new_hh_dialog:
             self.on_actionNew_triggered()
 
@@ -94,6 +130,19 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
         if self.actionOpenGL.isChecked():
             self.graphics_view.setViewport(QtWidgets.QOpenGLWidget())
         self.graphics_view.setScene(table_scene)
+        self.render_profile.apply(self.graphics_view)
+        table_scene.set_cache_mode(self.render_profile.cache_mode)
+
+    @staticmethod
+    def _prefetch_looks():
+        # the tables and backgrounds of the menu, so that switching is instant
+        Image.prefetch(
+            *(
+                Path(directory) / path.stem
+                for directory in ("table", "background")
+                for path in sorted((Image.IMG_PATH / directory).iterdir())
+            )
+        )
 
     def _initialize_hh(self):
         player_items = self.scene.get_active_players_after_button()
@@ -123,6 +172,7 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
         self._fit_scene()
 
     def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        self.graphics_view.frame_timer.report()
         config.save_config(self.saveGeometry(), self.saveState())
         super().closeEvent(event)
 
@@ -182,7 +232,7 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
                     )
             config.save_config()
             self.widgets["checkBoxEditMode"].setChecked(True)
-            self.replay_action_cursor = 0
+            self._forget_replay()
             self.graphics_view.setInteractive(True)
         elif dialog.open_instead:
             self.on_actionOpen_triggered()
@@ -193,59 +243,9 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
         if self.state == self.State.INIT:
             self.scene.init_hh(self.hand_history)
             self.state = self.state.next()
-        elif self.state == self.State.REPLAY:
-            self.replay_action_cursor += 1
-            if self.replay_action_cursor > len(self.hand_history.editable_actions()):
-                if (
-                    self.replay_action_cursor
-                    == len(self.hand_history.editable_actions()) + 1
-                ):
-                    Animations.reset()
-                    self.scene.bets_to_pot_animations(
-                        self.hand_history, add_last_call=False
-                    )
-                    self.scene.clear_bet_items()
-                    self.scene.update_total_pot(self.hand_history)
-                    Animations.start()
-                play_len = self.hand_history.play_length()
-                if self.replay_action_cursor == play_len - 4:
-                    sounds["street"].play()
-                    self.scene.show_flop()
-                elif self.replay_action_cursor == play_len - 3:
-                    self.scene.show_turn()
-                    sounds["street"].play()
-                elif self.replay_action_cursor == play_len - 2:
-                    self.scene.show_river()
-                    sounds["street"].play()
-                elif self.replay_action_cursor == play_len - 1:
-                    self.scene.show_known_hands()
-                else:
-                    self.scene.update_winners(self.hand_history)
-            else:
-                hand_history = self.hand_history.at_action(self.replay_action_cursor)
-                self.scene.sync_with_hh(hand_history, update_board=False)
-                cur_street = hand_history.current_street
-                prev_street = hand_history.at_action(
-                    self.replay_action_cursor - 1
-                ).current_street
-                if cur_street == Street.FLOP and prev_street == Street.PRE_FLOP:
-                    self.state = self.State.WAIT_FOR_FLOP
-                elif cur_street == Street.TURN and prev_street == Street.FLOP:
-                    self.state = self.State.WAIT_FOR_TURN
-                elif cur_street == Street.RIVER and prev_street == Street.TURN:
-                    self.state = self.State.WAIT_FOR_RIVER
-        elif self.state == self.State.WAIT_FOR_FLOP:
-            self.scene.show_flop()
-            sounds["street"].play()
-            self.state = self.state.REPLAY
-        elif self.state == self.State.WAIT_FOR_TURN:
-            self.scene.show_turn()
-            sounds["street"].play()
-            self.state = self.state.REPLAY
-        elif self.state == self.State.WAIT_FOR_RIVER:
-            self.scene.show_river()
-            sounds["street"].play()
-            self.state = self.state.REPLAY
+        elif self.state in self.REPLAY_STATES:
+            self.replay_index += 1
+            self._play_frame(self.replay_frames[self.replay_index])
         self.update_buttons()
 
     @pyqtSlot()
@@ -253,49 +253,131 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
         if self.state == self.State.ACTIONS:
             self.hand_history.remove_last_action()
             self.scene.request_action(self.hand_history)
-        elif self.state in (
-            self.State.REPLAY,
-            self.State.WAIT_FOR_FLOP,
-            self.State.WAIT_FOR_TURN,
-            self.State.WAIT_FOR_RIVER,
-        ):
-            self.replay_action_cursor -= 1
-            self.state = self.State.REPLAY
-            if self.replay_action_cursor > len(self.hand_history.editable_actions()):
-                play_len = self.hand_history.play_length()
-                if self.replay_action_cursor == play_len - 4:
-                    self.scene.hide_board()
-                elif self.replay_action_cursor == play_len - 3:
-                    self.scene.show_flop()
-                elif self.replay_action_cursor == play_len - 2:
-                    self.scene.show_turn()
-                elif self.replay_action_cursor == play_len - 1:
-                    self.scene.hide_hands()
-                    self.scene.sync_with_hh(self.hand_history, rebuild_pots=True)
-            else:
-                hand_history = self.hand_history.at_action(self.replay_action_cursor)
-                pseudo_actions_remaining = self.replay_action_cursor != len(
-                    self.hand_history.editable_actions()
-                )
-                self.scene.sync_with_hh(
-                    hand_history,
-                    rebuild_pots=pseudo_actions_remaining,
-                    update_board=pseudo_actions_remaining,
-                )
-
+        elif self.state in self.REPLAY_STATES:
+            self._seek(self.replay_index - 1)
         self.update_buttons()
 
     @pyqtSlot()
     def on_pushButtonStart_clicked(self):
-        self.replay_action_cursor = -1
-        hand_history = self.hand_history.at_action(self.replay_action_cursor)
         self.checkBoxEditMode.setChecked(False)
-        self.scene.sync_with_hh(hand_history)
-        self.scene.hide_all_actions_widget()
-        self.scene.hide_board()
-        self.scene.show_all_active_players_cards()
+        if self.replay_frames is None:
+            self._compile_replay()
+        self._seek(0)
+        self.update_buttons()
+
+    @pyqtSlot(int)
+    def on_sliderReplay_valueChanged(self, index):
+        if self.state in self.REPLAY_STATES and index != self.replay_index:
+            self._seek(index)
+            self.update_buttons()
+
+    def _compile_replay(self):
+        """Starts compiling the replay in the background, from the first frame."""
+        hand_history = self.hand_history
+        self.replay_frames = [
+            ReplayFrame(hand_history.at_action(-1), board=Street.PRE_FLOP)
+        ]
+        if MainWindow._executor is None:
+            MainWindow._executor = ThreadPoolExecutor(1, thread_name_prefix="replay")
+        # the worker has its own copy of the hand, the edits can't reach it
+        self._replay_job = self._executor.submit(
+            precompile_replay, codec.hand_to_dict(hand_history), *self._replay_cards()
+        )
+        # emitted from the worker thread, received in the GUI thread
+        self._replay_job.add_done_callback(self.replay_compiled.emit)
+
+    def _replay_cards(self):
+        """The cards of the players by position and of the board, as strings."""
+        hands = {
+            p.hh_position: [c.deuces_format() for c in p.card_items[: p.n_cards]]
+            for p in self.scene.active_players()
+        }
+        return hands, [c.deuces_format() for c in self.scene.board]
+
+    @pyqtSlot(object)
+    def _on_replay_compiled(self, job: Future):
+        # an exception raised by a slot would abort the application
+        try:
+            self._take_replay(job)
+        except Exception as e:
+            log.exception("Cannot compile the replay")
+            msg = QMessageBox()
+            msg.setIcon(QMessageBox.Critical)
+            msg.setText("Replay impossible")
+            msg.setInformativeText(str(e))
+            msg.setWindowTitle("Erreur")
+            msg.exec_()
+
+    def wait_for_replay(self):
+        """Waits for the replay being compiled, e.g. without an event loop."""
+        if self._replay_job is not None:
+            self._take_replay(self._replay_job)
+
+    def _take_replay(self, job: Future):
+        if job is not self._replay_job:
+            # the hand was edited or replaced meanwhile
+            return
+        self._replay_job = None
+        try:
+            frames = job.result()
+        except Exception:
+            log.exception("Compiling the replay failed in the background, retrying")
+            frames = compile_replay(self.hand_history, *self._replay_cards())
+        self.replay_frames = frames
+        log.debug(f"Replay of {len(frames)} frames ready")
         self.update_buttons()
 
+    def _forget_replay(self):
+        self.replay_frames = None
+        self._replay_job = None
+
+    def _play_frame(self, frame: ReplayFrame):
+        """Plays the steps reaching frame from the one before, as Next does."""
+        self.state = self.State.REPLAY
+        scene = self.scene
+        for step in frame.steps:
+            if step == Step.SYNC:
+                scene.sync_with_hh(frame.hand_history, update_board=False, sound=False)
+            elif step == Step.COLLECT_BETS:
+                scene.collect_bets(frame.hand_history)
+            elif step == Step.SHOW_HANDS:
+                scene.show_known_hands()
+            elif step == Step.PAY_WINNERS:
+                scene.update_winners(frame.hand_history, frame.winners)
+            else:
+                scene.show_board(frame.board)
+        if frame.sound is not None:
+            try:
+                sounds[frame.sound].play()
+            except KeyError:
+                log.debug(f"No sound for {frame.sound}")
+        self._set_replay_state()
+
+    def _seek(self, index):
+        """Shows the frame at index at once, without animation nor sound."""
+        self.state = self.State.REPLAY
+        self.replay_index = index
+        frame = self.replay_frames[index]
+        scene = self.scene
+        # the end of the animations of the frame before would land later
+        scene.animations.reset()
+        scene.animations.finish()
+        state = frame_state(scene, frame, self.hide_cards_before_showdown())
+        changes = state.apply(scene)
+        log.debug(f"Seeking frame {index}: {changes} changes")
+        if frame.winners_paid:
+            scene.update_winners(frame.hand_history, frame.winners)
+            scene.animations.finish()
+        self._set_replay_state()
+
+    def _set_replay_state(self):
+        try:
+            steps = self.replay_frames[self.replay_index + 1].steps
+        except IndexError:
+            return
+        if len(steps) == 1 and steps[0] in self.WAIT_STATES:
+            self.state = self.WAIT_STATES[steps[0]]
+
     @pyqtSlot(bool)
     def on_checkBoxEditMode_toggled(self, checked):
         if checked:
@@ -303,6 +385,7 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
                 return
             self.graphics_view.setInteractive(True)
             self.state = self.State.ACTIONS
+            self._forget_replay()
             self.scene.sync_with_hh(self.hand_history)
             self.scene.request_action(self.hand_history)
             self.update_buttons()
@@ -425,8 +508,29 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
             self.graphics_view.setViewport(QtWidgets.QOpenGLWidget())
         else:
             self.graphics_view.setViewport(QtWidgets.QWidget())
+        self.render_profile.apply(self.graphics_view)
         config.config["animation"]["opengl"] = str(checked)
 
+    @pyqtSlot()
+    def on_actionSpeedSkip_triggered(self):
+        self.set_time_scale(0)
+
+    @pyqtSlot()
+    def on_actionSpeedNormal_triggered(self):
+        self.set_time_scale(1)
+
+    @pyqtSlot()
+    def on_actionSpeedDouble_triggered(self):
+        self.set_time_scale(2)
+
+    @pyqtSlot()
+    def on_actionSpeedFast_triggered(self):
+        self.set_time_scale(10)
+
+    def set_time_scale(self, time_scale):
+        self.scene.animations.clock.set_time_scale(time_scale)
+        config.config["animation"]["time_scale"] = str(time_scale)
+
     @pyqtSlot()
     def on_actionRestoreConfig_triggered(self):
         log.info("Restoring config defaults")
@@ -447,7 +551,7 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
         )
 
     def save_hh(self, filename):
-        hh_dict = self.hand_history.to_dict()
+        hh_dict = codec.hand_to_dict(self.hand_history)
         hh_dict["n_decimals"] = TextItem.n_decimals
         hh_dict["player_names"] = [
             p.name_item.content for p in self.scene.get_active_players_after_button()
@@ -465,23 +569,18 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
         hh_dict["currency"] = self.scene.currency
         hh_dict["currency_is_after"] = self.scene.currency_is_after
         with open(filename, "w", encoding="utf-8") as fp:
-            json.dump(hh_dict, fp, cls=HHJSONEncoder)
+            codec.dump(hh_dict, fp)
 
     def load_hh(self, filename):
         log.info(f"Loading HH file: {filename}")
         self.current_filename = filename
         with open(filename, "r", encoding="utf-8") as fp:
-            hh_dict = json.load(fp, object_hook=json_hook)
+            hh_dict = codec.load(fp)
         self.hand_history = HandHistory.from_dict(hh_dict)
+        self._forget_replay()
         self.scene.load_dict(hh_dict, self.hand_history)
         self.widgets["checkBoxEditMode"].setChecked(False)
-        # Compat with previous HH format that didn't include n_decimals
-        sb = self.hand_history.small_blind
-        ante = self.hand_history.ante
-        n_digits = hh_dict.get(
-            "n_decimals", max(-sb.as_tuple().exponent, -ante.as_tuple().exponent, 1)
-        )
-        TextItem.n_decimals = n_digits
+        TextItem.n_decimals = hh_dict["n_decimals"]
         self.pushButtonStart.clicked.emit()
 
     def update_buttons(self):
@@ -490,7 +589,9 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
         edit = self.widgets["checkBoxEditMode"]
         full = self.actionFullScreen
         start = self.widgets["pushButtonStart"]
+        slider = self.widgets["sliderReplay"]
         start.setEnabled(False)
+        slider.setEnabled(False)
         if self.state == self.State.INIT:
             next_.setEnabled(
                 self.scene.n_active_players >= 2 and self.scene.button_is_given
@@ -508,18 +609,22 @@ class MainWindow(QtWidgets.QMainWindow, AutoUI):
             back.setText("Annuler dernière action")
 
             back.setEnabled(self.hand_history.has_editable_actions())
-        elif self.state == self.State.REPLAY:
+        elif self.state in self.REPLAY_STATES:
             edit.setEnabled(True)
             full.setEnabled(True)
-            cur = self.replay_action_cursor
-
-            play_len = self.hand_history.play_length()
 
             back.setText("Retour")
             next_.setText("Suite")
 
-            next_.setEnabled(cur < play_len)
-            back.setEnabled(cur > -1)
+            # until the replay of a new hand starts
+            frames = self.replay_frames or ()
+            next_.setEnabled(self.replay_index < len(frames) - 1)
+            back.setEnabled(0 < self.replay_index < len(frames))
+
+            slider.setEnabled(bool(frames))
+            with QtCore.QSignalBlocker(slider):
+                slider.setMaximum(max(0, len(frames) - 1))
+                slider.setValue(self.replay_index)
 
             start.setEnabled(True)
 
@@ -547,11 +652,6 @@ class FullScreenView(QtWidgets.QGraphicsView, KeyboardShortcutsMixin):
         if main_window.actionOpenGL.isChecked():
             self.setViewport(QtWidgets.QOpenGLWidget())
 
-        self.setRenderHint(QtGui.QPainter.HighQualityAntialiasing, True)
-        self.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, True)
-        self.setRenderHint(QtGui.QPainter.Antialiasing, True)
-        self.setRenderHint(QtGui.QPainter.LosslessImageRendering, True)
-
         self.setOptimizationFlag(self.DontAdjustForAntialiasing, True)
         self.setOptimizationFlag(self.DontClipPainter, True)
         self.setOptimizationFlag(self.DontSavePainterState, True)
@@ -559,6 +659,9 @@ class FullScreenView(QtWidgets.QGraphicsView, KeyboardShortcutsMixin):
         self.setScene(scene)
         self.scene = scene
         self.main_window = main_window
+        profile = render_profile.get("full_screen")
+        profile.apply(self)
+        scene.set_cache_mode(profile.cache_mode)
         app = QtWidgets.QApplication.instance()
 
         try:
@@ -582,5 +685,10 @@ class FullScreenView(QtWidgets.QGraphicsView, KeyboardShortcutsMixin):
         # prevent scrolling on the scene in full screen
         pass
 
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:
+        self.frame_timer.report()
+        self.scene.set_cache_mode(self.main_window.render_profile.cache_mode)
+        super().closeEvent(event)
+
 
 log = logging.getLogger(__name__)
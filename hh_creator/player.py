@@ -4,16 +4,17 @@ from typing import Union
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 
-from . import config, hh
-from .animations import Animations
+from . import config
 from .card import CardItem
+from .clock import Clock
+from .core import hh
 from .dialog import ActionWidget
 from .text import NameItem, StackItem, TextItem
 from .util import Image
 
 
 class PlayerItemGroup(QtWidgets.QGraphicsItemGroup):
-    def __init__(self, id, n_cards=4, *a, **kw):
+    def __init__(self, id, clock: Clock, n_cards=4, *a, **kw):
         super().__init__(*a, **kw)
 
         self.card_items = []
@@ -28,7 +29,7 @@ class PlayerItemGroup(QtWidgets.QGraphicsItemGroup):
             color=config.config["text"].get("player_bet_color"),
         )
         self.action_widget = ActionWidget(self, None)
-        self.stack_item = StackItem()
+        self.stack_item = StackItem(clock)
         self.name_item = NameItem()
 
         self._adjust_positions()
@@ -116,6 +117,9 @@ class PlayerItemGroup(QtWidgets.QGraphicsItemGroup):
         else:
             self.setOpacity(0.5)
         self._active = active
+        if self.scene() is not None:
+            # the seat is painted there
+            self.scene().invalidate_static_layer()
 
     def reset(self):
         self.bet_item.content = 0
@@ -132,12 +136,11 @@ class PlayerItemGroup(QtWidgets.QGraphicsItemGroup):
         if target is None:
             target = self.bet_item
 
-        Animations.text(
+        self.scene().animations.text(
             source=self.stack_item.stack_item,
             target=target,
             content=amount,
             duration=config.config["animation"].getint("stack_to_bet_duration"),
-            scene=self.scene(),
             callbacks=[lambda: setattr(self.bet_item, "content", street_bet_amount)],
             target_font=True,
         )
@@ -183,31 +186,29 @@ class PlayerItemGroup(QtWidgets.QGraphicsItemGroup):
             c.setVisible(False)
 
     def show_actions_widget(self, hand_history: hh.HandHistory):
-        possible = hand_history.possible_action_types()
-        if hh.ActionType.RAISE in possible:
-            min_raise = hand_history.minimum_raise()
+        legal = hand_history.legal_actions()
+        if hh.ActionType.RAISE in legal.action_types:
             min_bet = min(
-                min_raise
-                + hand_history.current_player_amount_to_call()
-                + hand_history.current_player_street_bet(),
+                legal.min_raise + legal.amount_to_call + legal.street_bet,
                 self.stack_item.stack,
             )
-            log.debug(f"Min raise is {min_raise} → min pseudobet is {min_bet}")
+            log.debug(f"Min raise is {legal.min_raise} → min pseudobet is {min_bet}")
         else:
             min_bet = hand_history.largest_blind
-        max_bet = self.stack_item.stack + hand_history.current_player_street_bet()
+        max_bet = self.stack_item.stack + legal.street_bet
         self.action_widget.set_min_max_step(min_bet, max_bet, hand_history.small_blind)
-        self.action_widget.set_possible_actions(possible)
+        self.action_widget.set_possible_actions(legal.action_types)
         self.action_widget_item.setVisible(True)
 
     def add_action(self, action_type, amount=Decimal(0)):
         hand_history: hh.HandHistory = self.scene().parent().hand_history
         hh_player = hand_history.get_player_by_position(self.hh_position)
+        legal = hand_history.legal_actions()
 
         adjust = False
         if (
             action_type == hh.ActionType.BET
-            and hh.ActionType.BET not in hand_history.possible_action_types()
+            and hh.ActionType.BET not in legal.action_types
         ):
             log.debug("Pseudo bet is in fact a raise")
             action_type = hh.ActionType.RAISE
@@ -223,11 +224,7 @@ class PlayerItemGroup(QtWidgets.QGraphicsItemGroup):
             adjust = True
 
         if adjust:
-            new_amount = (
-                amount
-                - hand_history.current_player_amount_to_call()
-                - hand_history.current_player_street_bet()
-            )
+            new_amount = amount - legal.amount_to_call - legal.street_bet
             log.debug(f"Requested bet {amount}, transforming it to raise {new_amount}")
             amount = new_amount
         hand_history.add_action(action_type, amount)
@@ -0,0 +1,166 @@
+"""
+Render profiles: how the scene is painted by a view, or by the export.
+
+The items that don't change during a replay (background, table, seats, dealer
+button) are cached as pixmaps, so that the animations only repaint the items
+that move. The editing window is resized often, so its cache is in item
+coordinates and survives the resizes; the full screen view and the export
+always paint at the same scale, so theirs is in device coordinates, exact to
+the pixel.
+
+The time taken by each repaint of a view is measured, and logged when the view
+is closed.
+"""
+
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Union
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from . import config
+
+QPainter = QtGui.QPainter
+QGraphicsItem = QtWidgets.QGraphicsItem
+QGraphicsView = QtWidgets.QGraphicsView
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str
+    # of the items that don't change during a replay
+    cache_mode: QGraphicsItem.CacheMode
+    # None for the export, which has no view
+    viewport_update_mode: Union[None, QGraphicsView.ViewportUpdateMode]
+    render_hints: QPainter.RenderHints
+
+    def apply(self, view: QGraphicsView):
+        """Sets up a view, the cache mode is set on the scene separately."""
+        set_pixmap_cache_limit()
+        view.setRenderHints(self.render_hints)
+        if isinstance(view.viewport(), QtWidgets.QOpenGLWidget):
+            # the GL viewport is repainted entirely anyway
+            view.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        else:
+            view.setViewportUpdateMode(self.viewport_update_mode)
+        old = getattr(view, "frame_timer", None)
+        if old is not None:
+            old.report()
+            view.viewport().removeEventFilter(old)
+            old.deleteLater()
+        view.frame_timer = FrameTimer(self.name, view)
+
+
+PROFILES: Dict[str, RenderProfile] = {
+    profile.name: profile
+    for profile in (
+        RenderProfile(
+            "editing",
+            QGraphicsItem.ItemCoordinateCache,
+            QGraphicsView.MinimalViewportUpdate,
+            QPainter.Antialiasing
+            | QPainter.SmoothPixmapTransform
+            | QPainter.TextAntialiasing,
+        ),
+        RenderProfile(
+            "fullscreen",
+            QGraphicsItem.DeviceCoordinateCache,
+            QGraphicsView.MinimalViewportUpdate,
+            QPainter.Antialiasing
+            | QPainter.HighQualityAntialiasing
+            | QPainter.SmoothPixmapTransform
+            | QPainter.TextAntialiasing
+            | QPainter.LosslessImageRendering,
+        ),
+        RenderProfile(
+            "export",
+            QGraphicsItem.DeviceCoordinateCache,
+            None,
+            QPainter.Antialiasing
+            | QPainter.SmoothPixmapTransform
+            | QPainter.TextAntialiasing,
+        ),
+    )
+}
+
+
+DEFAULT_PROFILES = {
+    "window": "editing",
+    "full_screen": "fullscreen",
+    "export": "export",
+}
+
+
+def get(usage) -> RenderProfile:
+    """The profile configured for "window", "full_screen" or "export"."""
+    name = config.config["render"].get(f"{usage}_profile")
+    try:
+        return PROFILES[name]
+    except KeyError:
+        log.warning(f"Unknown render profile {name!r} for {usage}")
+        return PROFILES[DEFAULT_PROFILES[usage]]
+
+
+def set_pixmap_cache_limit():
+    # the cached items share the QPixmapCache, whose 10 MB by default would
+    # not even hold the background and table of a full screen view: they
+    # would be evicted and painted again at every frame
+    limit = config.config["render"].getint("pixmap_cache_mb") * 1024
+    if QtGui.QPixmapCache.cacheLimit() < limit:
+        QtGui.QPixmapCache.setCacheLimit(limit)
+
+
+class FrameTimer(QtCore.QObject):
+    """
+    Frame times, in milliseconds. The repaints of a view are measured by
+    painting them from an event filter, other frames are added by hand.
+    """
+
+    # frames kept for the statistics
+    MAX_FRAMES = 1000
+
+    def __init__(self, name, view: QGraphicsView = None):
+        super().__init__(view)
+        self.name = name
+        self.view = view
+        self.frame_times = deque(maxlen=self.MAX_FRAMES)
+        if view is not None:
+            # installed last, so it is called before the filter of the view
+            view.viewport().installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() != QtCore.QEvent.Paint:
+            return False
+        start = time.perf_counter()
+        self.view.viewportEvent(event)
+        self.frame_times.append((time.perf_counter() - start) * 1000)
+        return True
+
+    def add(self, ms):
+        self.frame_times.append(ms)
+
+    def stats(self):
+        times = sorted(self.frame_times)
+        if not times:
+            return None
+        return {
+            "frames": len(times),
+            "mean": sum(times) / len(times),
+            "p95": times[int(0.95 * (len(times) - 1))],
+            "max": times[-1],
+        }
+
+    def report(self):
+        stats = self.stats()
+        if stats is None:
+            return
+        log.info(
+            f"Render profile {self.name}: {stats['frames']} frames, "
+            f"mean {stats['mean']:.1f} ms, 95th percentile {stats['p95']:.1f} ms, "
+            f"max {stats['max']:.1f} ms"
+        )
+
+
+log = logging.getLogger(__name__)
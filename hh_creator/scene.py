@@ -1,13 +1,19 @@
 import logging
+import math
+from collections import OrderedDict
 from decimal import Decimal
 from pathlib import Path
+from typing import Dict, Union
 
-from PyQt5 import Qt, QtGui, QtWidgets
+from PyQt5 import Qt, QtCore, QtGui, QtWidgets
 
-from . import config, hh
+from . import config
 from .animations import Animations
-from .card import CardItem, Rank, Suit, get_winners
+from .card import CardItem, get_winners
+from .core import hh, replay
+from .core.enums import Rank, Suit
 from .player import PlayerItemGroup
+from .shadow import ShadowItem
 from .text import TextItem
 from .util import Image, get_center, sounds
 
@@ -15,12 +21,15 @@ from .util import Image, get_center, sounds
 class TableScene(QtWidgets.QGraphicsScene):
     def __init__(self, parent):
         super().__init__(parent)
+        self.animations = Animations(self)
         self._create_background()
         self._create_button()
         self._create_board()
         self._create_text_items()
 
-        self.player_items = [PlayerItemGroup(id=i) for i in range(10)]
+        self.player_items = [
+            PlayerItemGroup(id=i, clock=self.animations.clock) for i in range(10)
+        ]
 
         self.transform = QtGui.QTransform()
         self.board_street = hh.Street.ANTE
@@ -30,8 +39,15 @@ class TableScene(QtWidgets.QGraphicsScene):
         self._currency = ""
         self._currency_is_after = True
 
-        self._get_highlight_effect()
+        self._create_highlight()
         self._n_seats = None
+        self.cache_mode = QtWidgets.QGraphicsItem.NoCache
+
+        # pixmaps of the flattened items, by scale and offset of the painter
+        self._table_layers: OrderedDict[tuple, QtGui.QPixmap] = OrderedDict()
+        self._static_layers: OrderedDict[tuple, QtGui.QPixmap] = OrderedDict()
+        self.static_layer = False
+        self.set_static_layer(config.config["render"].getboolean("static_layer"))
 
         self.hide_board()
 
@@ -120,13 +136,12 @@ class TableScene(QtWidgets.QGraphicsScene):
             setattr(i, "currency", self._currency)
             setattr(i, "currency_is_after", self._currency_is_after)
 
-    def _get_highlight_effect(self):
-        highlight_effect = QtWidgets.QGraphicsDropShadowEffect()
-        highlight_effect.setColor(QtGui.QColor("white"))
-        highlight_effect.setOffset(0)
-        highlight_effect.setBlurRadius(200)
-
-        self.highlight_effect = highlight_effect
+    def _create_highlight(self):
+        # the glow of the player to act, between the table and the players
+        self.highlight_item = ShadowItem("white", 200)
+        self.highlight_item.setZValue(-10)
+        self.highlight_item.setVisible(False)
+        self.addItem(self.highlight_item)
 
     def _get_player_item_from_hh_position(self, position: hh.Position):
         for p in self.active_players():
@@ -145,23 +160,30 @@ class TableScene(QtWidgets.QGraphicsScene):
         except FileNotFoundError:
             background = Image.get(Path("background") / "black-plain")
 
-        shadow = QtWidgets.QGraphicsDropShadowEffect()
-        shadow.setBlurRadius(config.config["look"].getfloat("TABLE_SHADOW_RADIUS"))
-        table_item.setGraphicsEffect(shadow)
+        # the default colour of QGraphicsDropShadowEffect
+        shadow = ShadowItem(
+            QtGui.QColor(63, 63, 63, 180),
+            config.config["look"].getfloat("TABLE_SHADOW_RADIUS"),
+        )
         table_rectf = Qt.QRectF(table_item.boundingRect())
 
         self.background_item = background
         self.background_item.setZValue(-100)
         self.table_shadow = shadow
+        self.table_shadow.setZValue(-75)
         self.table_item = table_item
+        self.table_item.setZValue(-50)
 
         self.setSceneRect(table_rectf)
         self.addItem(background)
+        self.addItem(shadow)
         self.addItem(table_item)
+        shadow.cast([table_item])
 
     def _place_players(self):
         self.reset_button()
         self._clear_text()
+        self.highlight_item.setVisible(False)
         self.board_street = hh.Street.ANTE
         log.debug("Placing players")
         self.button_position = []
@@ -287,6 +309,7 @@ class TableScene(QtWidgets.QGraphicsScene):
         self._place_players()
         self.hide_board()
         CardItem.reset()
+        self.invalidate_static_layer()
 
     def set_all_stacks(self, value):
         for p in self.player_items:
@@ -296,18 +319,150 @@ class TableScene(QtWidgets.QGraphicsScene):
         for p in self.player_items:
             p.n_cards = value
 
+    def static_items(self):
+        """The items that don't change during a replay."""
+        items = [self.background_item, self.table_shadow, self.table_item]
+        items.append(self.button_item)
+        items.extend(p.seat_item for p in self.player_items)
+        # only changes between the steps
+        items.append(self.highlight_item)
+        return items
+
+    def set_cache_mode(self, mode: QtWidgets.QGraphicsItem.CacheMode):
+        self.cache_mode = mode
+        for item in self.static_items():
+            item.setCacheMode(mode)
+
+    def flattened_items(self):
+        """The items painted in the static layer, from the bottom."""
+        return self._table_layer_items() + self._seat_layer_items()
+
+    def _table_layer_items(self):
+        return [self.background_item, self.table_shadow, self.table_item]
+
+    def _seat_layer_items(self):
+        # the highlight moves at every step, so the seats are painted over a
+        # copy of the table layer, kept for that
+        return [self.highlight_item] + [p.seat_item for p in self.player_items]
+
+    def set_static_layer(self, enabled):
+        """
+        Paints the flattened items as a single pixmap, below the other items.
+        They are still in the scene, for the clicks, but the views skip them.
+        """
+        self.static_layer = enabled
+        for item in self.flattened_items():
+            item.setFlag(item.ItemHasNoContents, enabled)
+        self.invalidate_static_layer(table=True)
+
+    def invalidate_static_layer(self, table=False):
+        """To call when a flattened item changes, table for the table layer."""
+        if table:
+            self._table_layers.clear()
+        self._static_layers.clear()
+        self.invalidate(self.sceneRect(), self.BackgroundLayer)
+
+    def drawBackground(self, painter: QtGui.QPainter, rect: Qt.QRectF):
+        if not self.static_layer:
+            return
+        t = painter.worldTransform()
+        origin = t.map(self.sceneRect().topLeft())
+        x, y = math.floor(origin.x()), math.floor(origin.y())
+        dpr = painter.device().devicePixelRatioF()
+        key = (t.m11(), t.m22(), origin.x() - x, origin.y() - y, dpr)
+        try:
+            layer = self._static_layers[key]
+        except KeyError:
+            try:
+                table_layer = self._table_layers[key]
+            except KeyError:
+                table_layer = self._paint_layer(
+                    key, painter.renderHints(), self._table_layer_items()
+                )
+                self._cache_layer(self._table_layers, key, table_layer)
+            layer = self._paint_layer(
+                key, painter.renderHints(), self._seat_layer_items(), table_layer
+            )
+            self._cache_layer(self._static_layers, key, layer)
+
+        # blitted pixel for pixel, in the coordinates of the device
+        target = t.mapRect(rect).toAlignedRect() & Qt.QRect(
+            x, y, math.ceil(layer.width() / dpr), math.ceil(layer.height() / dpr)
+        )
+        source = target.translated(-x, -y)
+        painter.save()
+        painter.resetTransform()
+        painter.drawPixmap(
+            Qt.QRectF(target),
+            layer,
+            Qt.QRectF(
+                source.x() * dpr,
+                source.y() * dpr,
+                source.width() * dpr,
+                source.height() * dpr,
+            ),
+        )
+        painter.restore()
+
+    @staticmethod
+    def _cache_layer(layers, key, layer):
+        layers[key] = layer
+        # the editing window, the full screen view and the export
+        while len(layers) > 3:
+            layers.popitem(last=False)
+
+    def _paint_layer(self, key, hints, items, below=None) -> QtGui.QPixmap:
+        sx, sy, dx, dy, dpr = key
+        log.debug(f"Painting a static layer at scale {sx:.3f}")
+        rect = self.sceneRect()
+        if below is not None:
+            layer = below.copy()
+        else:
+            layer = QtGui.QPixmap(
+                math.ceil((rect.width() * sx + 1) * dpr),
+                math.ceil((rect.height() * sy + 1) * dpr),
+            )
+            layer.setDevicePixelRatio(dpr)
+            layer.fill(QtCore.Qt.transparent)
+        to_layer = (
+            QtGui.QTransform.fromTranslate(-rect.x(), -rect.y())
+            * QtGui.QTransform.fromScale(sx, sy)
+            * QtGui.QTransform.fromTranslate(dx, dy)
+        )
+        painter = QtGui.QPainter(layer)
+        painter.setRenderHints(hints)
+        option = QtWidgets.QStyleOptionGraphicsItem()
+        for item in items:
+            if item.scene() is not self or not item.isVisible():
+                continue
+            painter.setTransform(item.sceneTransform() * to_layer)
+            painter.setOpacity(item.effectiveOpacity())
+            # some SVG files draw past their view box
+            painter.setClipRect(item.boundingRect())
+            item.paint(painter, option, None)
+        painter.end()
+        return layer
+
+    def _highlight_state(self):
+        item = self.highlight_item
+        return item.isVisible(), item.pos(), item.pixmap().cacheKey()
+
     def change_table(self, color):
         config.config["look"]["table"] = color
         self.removeItem(self.table_item)
         self.table_item.deleteLater()
         self.table_item = Image.get(Path("table") / color)
-        self.table_item.setGraphicsEffect(self.table_shadow)
         self.table_item.setZValue(-50)
+        self.table_item.setCacheMode(self.cache_mode)
+        self.table_item.setFlag(self.table_item.ItemHasNoContents, self.static_layer)
         self.addItem(self.table_item)
+        self.table_shadow.cast([self.table_item])
+        self.invalidate_static_layer(table=True)
 
     def change_background(self, name):
         config.config["look"]["webcam"] = name
-        self.background_item.setPixmap(Image.get(Path("background") / name).pixmap())
+        self.background_item.setPixmap(Image.pixmap(Path("background") / name))
+        self.invalidate_static_layer(table=True)
 
     def load_dict(self, hh_dict, hand_history):
         self._clear_text()
@@ -414,13 +569,12 @@ class TableScene(QtWidgets.QGraphicsScene):
                 )
 
                 bet_item = player_item.bet_item
-                Animations.text(
+                self.animations.text(
                     source=bet_item,
                     target=pot_item,
                     duration=config.config["animation"].getint(
                         "BETS_TO_POT_ANIMATION_DURATION"
                     ),
-                    scene=self,
                 )
 
             pot_item.content = side_pot.amount
@@ -446,18 +600,17 @@ class TableScene(QtWidgets.QGraphicsScene):
             amount = Decimal(item.content) / split
             log.debug(f"Animating {amount} to {position}")
 
-            Animations.text(
+            self.animations.text(
                 source=item,
                 content=amount,
                 target=player_item.stack_item.stack_item,
                 duration=config.config["animation"].getint("POT_TO_WINNER_DURATION"),
-                scene=self,
                 callbacks=[],
             )
 
             total += amount
 
-        Animations.add_callback(
+        self.animations.add_callback(
             lambda: setattr(
                 player_item.stack_item,
                 "stack",
@@ -469,80 +622,94 @@ class TableScene(QtWidgets.QGraphicsScene):
 
     def ante_animations(self, hand_history: hh.HandHistory):
         for i, p in enumerate(self.active_players()):
-            Animations.text(
+            self.animations.text(
                 source=p.stack_item.stack_item,
                 content=hand_history.ante,
                 duration=config.config["animation"].getint(
                     "BETS_TO_POT_ANIMATION_DURATION"
                 ),
                 target=self.total_pot_item,
-                scene=self,
             )
 
     def bb_ante_animation(self, hand_history: hh.HandHistory):
-        Animations.text(
+        self.animations.text(
             source=self.bb_player().stack_item.stack_item,
             content=hand_history.bb_ante,
             duration=config.config["animation"].getint(
                 "BETS_TO_POT_ANIMATION_DURATION"
             ),
             target=self.total_pot_item,
-            scene=self,
         )
 
     def clear_side_pots(self):
         for pot_item in [self.central_pot_item] + self.side_pot_items:
             pot_item.content = 0
 
-    def show_down(self, hand_history):
-        for side_pot, side_pot_item in zip(
-            hand_history.side_pots(), [self.central_pot_item] + self.side_pot_items
+    def show_down(self, hand_history, winners=None):
+        """
+        Gives the pots to the winners of the showdown: the positions computed
+        by replay.showdown_winners() if given, evaluated from the cards if not.
+        """
+        for i, (side_pot, side_pot_item) in enumerate(
+            zip(hand_history.side_pots(), [self.central_pot_item] + self.side_pot_items)
         ):
-            player_items = []
-            for side_pot_player in side_pot.players:
-                player_items.append(
-                    self._get_player_item_from_hh_position(side_pot_player.position)
-                )
+            if winners is not None:
+                positions = winners[i]
+                if positions is None:
+                    log.warning("Showdown impossible: unknown cards")
+                    continue
+            else:
+                player_items = []
+                for side_pot_player in side_pot.players:
+                    player_items.append(
+                        self._get_player_item_from_hh_position(side_pot_player.position)
+                    )
 
-            try:
-                winners = get_winners(player_items, self.board)
-            except (AttributeError, KeyError) as e:
-                log.warning(f"Showdown impossible {e}")
-                continue
-            for w in winners:
+                try:
+                    positions = [
+                        w.hh_position for w in get_winners(player_items, self.board)
+                    ]
+                except (AttributeError, KeyError) as e:
+                    log.warning(f"Showdown impossible {e}")
+                    continue
+            for position in positions:
                 self.animate_pot_to_winner(
-                    w.hh_position, side_pot_item, split=len(winners)
+                    position, side_pot_item, split=len(positions)
                 )
 
+    def collect_bets(self, hand_history):
+        """Moves the bets of the last street to the pots, at the end of the hand."""
+        self.animations.reset()
+        self.bets_to_pot_animations(hand_history, add_last_call=False)
+        self.clear_bet_items()
+        self.update_total_pot(hand_history)
+        self.animations.start()
+
     def clear_bet_items(self):
         for p in self.player_items:
             p.bet_item.content = 0
 
-    def update_winners(self, hand_history):
-        Animations.reset()
+    def update_winners(self, hand_history, winners=None):
+        self.animations.reset()
         self.show_known_hands()
         if hand_history.winner is None:
-            self.show_down(hand_history)
+            self.show_down(hand_history, winners)
         else:
             # p = self._get_player_item_from_hh_position(hand_history.winner.position)
             self.animate_pot_to_winner(hand_history.winner.position)
             self.clear_bet_items()
         self._clear_text()
-        Animations.start()
+        self.animations.start()
 
     def update_total_pot(self, hand_history):
-        central_pot = hand_history.central_pot
-        total_pot = hand_history.total_pot
-
-        if central_pot != total_pot:
-            self.total_pot_item.content = total_pot
-        else:
-            self.total_pot_item.content = 0
+        self.total_pot_item.content = replay.total_pot_shown(hand_history)
 
-    def sync_with_hh(self, hand_history, rebuild_pots=False, update_board=True):
+    def sync_with_hh(
+        self, hand_history, rebuild_pots=False, update_board=True, sound=True
+    ):
         log.debug("Syncing table with HH")
 
-        Animations.reset()
+        self.animations.reset()
 
         if self.parent().hide_cards_before_showdown():
             self.hide_hands()
@@ -550,31 +717,7 @@ class TableScene(QtWidgets.QGraphicsScene):
             self.show_known_hands()
 
         self.update_total_pot(hand_history)
-
-        total_pot = hand_history.total_pot
-
-        if hand_history.current_player is not None:
-            to_call = hand_history.current_player_amount_to_call()
-
-            if to_call != 0:
-                try:
-                    diff = min(
-                        abs(
-                            hand_history.current_player.initial_stack
-                            - hand_history.actions[-1].player.initial_stack
-                        ),
-                        0,
-                    )
-                except IndexError:
-                    self.pot_odds.content = 0
-                else:
-                    pseudo_total = total_pot - diff
-
-                    self.pot_odds.content = pseudo_total / to_call
-            else:
-                self.pot_odds.content = 0
-        else:
-            self.pot_odds.content = 0
+        self.pot_odds.content = replay.pot_odds(hand_history)
 
         next_street = self.board_street < hand_history.current_street
         if self.board_street == hh.Street.ANTE and hand_history.ante:
@@ -589,62 +732,54 @@ class TableScene(QtWidgets.QGraphicsScene):
         for p in self.active_players():
             p.sync_with_hh(hand_history)
 
-        if hand_history.current_player is not None:
-            player_item = self._get_player_item_from_hh_position(
-                hand_history.current_player.position
-            )
-            try:
-                player_item.setGraphicsEffect(self.highlight_effect)
-            except RuntimeError:
-                self._get_highlight_effect()
-                player_item.setGraphicsEffect(self.highlight_effect)
-        else:
-            for p in self.active_players():
-                p.setGraphicsEffect(None)
+        current_player = hand_history.current_player
+        self.highlight_player(
+            None if current_player is None else current_player.position
+        )
 
         street_back = self.board_street > hand_history.current_street
         if street_back or rebuild_pots:
-            if hand_history.current_street == hh.Street.PRE_FLOP:
-                for side_pot_item in [self.central_pot_item] + self.side_pot_items:
-                    side_pot_item.content = 0
-                if hand_history.ante:
-                    self.central_pot_item.content = hand_history.central_pot
-            else:
-                side_pots = hand_history.side_pots(at_street_begin=True)
-                for i, side_pot_item in enumerate(
-                    [self.central_pot_item] + self.side_pot_items
-                ):
-                    try:
-                        val = side_pots[i].amount
-                    except IndexError:
-                        val = 0
-                    side_pot_item.content = val
+            for pot_item, amount in self.pot_contents(
+                replay.street_begin_pots(hand_history)
+            ).items():
+                pot_item.content = amount
 
         self.board_street = hand_history.current_street
 
         last_action = hand_history.last_action
 
-        try:
-            if next_street and last_action.action_type == hh.ActionType.CALL:
-                sounds["call_closing"].play()
-            else:
-                sounds[last_action.action_type].play()
-        except KeyError:
-            log.debug(f"No sound for action {last_action.action_type}")
-        except AttributeError:
-            log.debug("No action, no sound")
-
-        if update_board:
-            if hand_history.current_street in (hh.Street.SHOWDOWN, hh.Street.RIVER):
-                self.show_river()
-            elif hand_history.current_street == hh.Street.FLOP:
-                self.show_flop()
-            elif hand_history.current_street == hh.Street.TURN:
-                self.show_turn()
-            elif hand_history.current_street == hh.Street.PRE_FLOP:
-                self.hide_board()
-
-        Animations.start()
+        if sound:
+            try:
+                if next_street and last_action.action_type == hh.ActionType.CALL:
+                    sounds["call_closing"].play()
+                else:
+                    sounds[last_action.action_type].play()
+            except KeyError:
+                log.debug(f"No sound for action {last_action.action_type}")
+            except AttributeError:
+                log.debug("No action, no sound")
+
+        if update_board and hand_history.current_street != hh.Street.ANTE:
+            self.show_board(hand_history.current_street)
+
+        self.animations.start()
+
+    def highlight_player(self, position: Union[None, hh.Position]):
+        """Lights the seat of the player at position, nobody's for None."""
+        highlight = self._highlight_state()
+        if position is not None:
+            player_item = self._get_player_item_from_hh_position(position)
+            self.highlight_item.cast([player_item.seat_item] + player_item.card_items)
+        else:
+            self.highlight_item.setVisible(False)
+        if self._highlight_state() != highlight:
+            self.invalidate_static_layer()
+
+    def pot_contents(self, amounts) -> Dict[TextItem, object]:
+        """The contents of the pot items showing amounts, 0 for the others."""
+        pot_items = [self.central_pot_item] + self.side_pot_items
+        amounts = list(amounts)[: len(pot_items)]
+        return dict(zip(pot_items, amounts + [0] * (len(pot_items) - len(amounts))))
 
     def show_known_hands(self):
         for p in self.active_players():
@@ -662,6 +797,17 @@ class TableScene(QtWidgets.QGraphicsScene):
         for c in self.board:
             c.setVisible(False)
 
+    def show_board(self, street: hh.Street):
+        """Shows the cards of the board dealt until street."""
+        if street in (hh.Street.RIVER, hh.Street.SHOWDOWN):
+            self.show_river()
+        elif street == hh.Street.TURN:
+            self.show_turn()
+        elif street == hh.Street.FLOP:
+            self.show_flop()
+        else:
+            self.hide_board()
+
     def show_flop(self):
         for c in self.board[:3]:
             c.setVisible(True)
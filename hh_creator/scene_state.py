@@ -0,0 +1,106 @@
+"""
+The table as a set of item values, set by the differences only.
+
+Seeking in a replay doesn't play the steps leading to a frame: the values of
+the text items, the visibility of the cards and the faces shown are computed
+from the frame, and only the ones differing from what the items show are set,
+without animation or sound. Dragging the replay slider over a long hand then
+costs a few item updates per frame.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Union
+
+from PyQt5 import QtWidgets
+
+from .card import CardItem
+from .clock import Timer
+from .core import hh
+from .core.replay import ReplayFrame
+from .text import TextItem
+
+BOARD_SIZES = {
+    hh.Street.FLOP: 3,
+    hh.Street.TURN: 4,
+    hh.Street.RIVER: 5,
+    hh.Street.SHOWDOWN: 5,
+}
+
+
+@dataclass
+class SceneState:
+    contents: Dict[TextItem, object] = field(default_factory=dict)
+    visible: Dict[QtWidgets.QGraphicsItem, bool] = field(default_factory=dict)
+    # whether the cards show their face
+    faces: Dict[CardItem, bool] = field(default_factory=dict)
+    highlight: Union[None, hh.Position] = None
+    street: hh.Street = hh.Street.ANTE
+    # ending the display of the last actions, which would set the stacks
+    timers: List[Timer] = field(default_factory=list)
+
+    def apply(self, scene) -> int:
+        """Sets the values differing from the items of scene, returns how many."""
+        for timer in self.timers:
+            timer.stop()
+        changes = 0
+        for item, content in self.contents.items():
+            if item.content != content:
+                item.content = content
+                changes += 1
+        for item, visible in self.visible.items():
+            # the item itself, whether its parent is visible or not
+            if item.isVisibleTo(item.parentItem()) != visible:
+                item.setVisible(visible)
+                changes += 1
+        for card, face in self.faces.items():
+            if card.back.isVisibleTo(card) == face:
+                if face:
+                    card.discover()
+                else:
+                    card.hide_face()
+                changes += 1
+        # only repaints when the seat or the cards lit change
+        scene.highlight_player(self.highlight)
+        scene.board_street = self.street
+        return changes
+
+
+def frame_state(scene, frame: ReplayFrame, hide_hands: bool) -> SceneState:
+    """
+    What scene shows at frame once its animations are over, with the hands of
+    the players other than the hero face down if hide_hands.
+    """
+    values = frame.values
+    state = SceneState(highlight=values.current_player)
+    state.street = frame.hand_history.current_street
+    state.contents.update(scene.pot_contents(values.pots))
+    state.contents[scene.total_pot_item] = values.total_pot
+    state.contents[scene.pot_odds] = values.pot_odds
+
+    show_hands = frame.hands_shown or not hide_hands
+    for i, player in enumerate(scene.active_players()):
+        seat = values.seats[player.hh_position]
+        state.contents[player.bet_item] = seat.bet
+        # the last action is shown by the Next steps only
+        state.contents[player.stack_item.stack_item] = seat.stack
+        state.visible[player.stack_item.stack_item] = True
+        state.visible[player.stack_item.action_item] = False
+        state.visible[player.action_widget_item] = False
+        state.timers.append(player.stack_item.timer)
+        for j, card in enumerate(player.card_items):
+            state.visible[card] = j < player.n_cards and not seat.folded
+            if show_hands or i != scene.hero_idx:
+                state.faces[card] = show_hands and _known(card)
+
+    n_board = BOARD_SIZES.get(frame.board, 0)
+    for i, card in enumerate(scene.board):
+        state.visible[card] = i < n_board
+    return state
+
+
+def _known(card: CardItem):
+    return card.rank is not None and card.suit is not None
+
+
+log = logging.getLogger(__name__)
@@ -0,0 +1,145 @@
+"""
+Shadows and glows baked into pixmaps.
+
+A QGraphicsDropShadowEffect blurs its item again at every repaint, and has to
+render the whole item group offscreen whenever any child changes. Here the
+silhouette of the items is blurred once, in scene coordinates, and the result
+is cached by the geometry of the items and the colour: showing the shadow is
+then the drawing of a pixmap, by an item placed below them.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import ClassVar, Iterable, Tuple
+
+from PyQt5 import QtCore, QtGui, QtSvg, QtWidgets
+
+# the blur filter of QGraphicsBlurEffect multiplies its radius by 1.5, the one
+# of QGraphicsDropShadowEffect doesn't
+BLUR_RADIUS_SCALE = 1.5
+
+
+class ShadowItem(QtWidgets.QGraphicsPixmapItem):
+    """The blurred silhouette of some items, painted in one colour."""
+
+    MAX_CACHED = 16
+    # least recently used first
+    _pixmaps: ClassVar[OrderedDict[tuple, Tuple[QtGui.QPixmap, QtCore.QPointF]]] = (
+        OrderedDict()
+    )
+
+    def __init__(self, color, radius, parent=None):
+        super().__init__(parent)
+        self.color = QtGui.QColor(color)
+        self.radius = radius
+        self.setTransformationMode(QtCore.Qt.SmoothTransformation)
+
+    def shape(self):
+        # never in the way of the clicks on the items below
+        return QtGui.QPainterPath()
+
+    def cast(self, items: Iterable[QtWidgets.QGraphicsItem]):
+        """Shows the shadow of items, with the item sharing their position."""
+        items = list(items)
+        origin = items[0].scenePos()
+        to_origin = QtGui.QTransform.fromTranslate(-origin.x(), -origin.y())
+        layers = [
+            (layer, layer.sceneTransform() * to_origin)
+            for item in items
+            for layer in _visible_layers(item)
+        ]
+        key = (self.color.rgba(), self.radius) + tuple(
+            _geometry(layer, transform) for layer, transform in layers
+        )
+        try:
+            pixmap, offset = self._pixmaps[key]
+            self._pixmaps.move_to_end(key)
+        except KeyError:
+            pixmap, offset = self._bake(layers)
+            self._pixmaps[key] = pixmap, offset
+            while len(self._pixmaps) > self.MAX_CACHED:
+                self._pixmaps.popitem(last=False)
+        # setting the same pixmap would still repaint it
+        if pixmap.cacheKey() != self.pixmap().cacheKey():
+            self.setPixmap(pixmap)
+        if offset != self.offset():
+            self.setOffset(offset)
+        if origin != self.pos():
+            self.setPos(origin)
+        self.setVisible(True)
+
+    def _bake(self, layers):
+        log.debug(f"Baking a shadow of {len(layers)} items")
+        rect = QtCore.QRectF()
+        for item, transform in layers:
+            rect |= transform.mapRect(item.boundingRect())
+        # how far the blur spreads
+        margin = self.radius + 1
+        rect = rect.adjusted(-margin, -margin, margin, margin).toAlignedRect()
+
+        silhouette = QtGui.QImage(rect.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+        silhouette.fill(0)
+        painter = QtGui.QPainter(silhouette)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        option = QtWidgets.QStyleOptionGraphicsItem()
+        for item, transform in layers:
+            painter.setTransform(
+                transform * QtGui.QTransform.fromTranslate(-rect.x(), -rect.y())
+            )
+            # some SVG files draw past their view box
+            painter.setClipRect(item.boundingRect())
+            item.paint(painter, option, None)
+        painter.setClipping(False)
+        painter.resetTransform()
+        painter.setCompositionMode(QtGui.QPainter.CompositionMode_SourceIn)
+        painter.fillRect(silhouette.rect(), self.color)
+        painter.end()
+
+        blurred = _blur(silhouette, self.radius)
+        return QtGui.QPixmap.fromImage(blurred), QtCore.QPointF(rect.topLeft())
+
+
+def _visible_layers(item: QtWidgets.QGraphicsItem):
+    """The items painting something, among item and its children."""
+    if not item.isVisible():
+        return
+    if not item.flags() & item.ItemHasNoContents:
+        yield item
+    for child in item.childItems():
+        yield from _visible_layers(child)
+
+
+def _geometry(item: QtWidgets.QGraphicsItem, transform: QtGui.QTransform):
+    t = transform
+    return (_source(item), item.boundingRect().getRect()) + tuple(
+        round(x, 2) for x in (t.m11(), t.m12(), t.m21(), t.m22(), t.dx(), t.dy())
+    )
+
+
+def _source(item: QtWidgets.QGraphicsItem):
+    """What the item paints, as far as its outline is concerned."""
+    if isinstance(item, QtWidgets.QGraphicsPixmapItem):
+        return item.pixmap().cacheKey()
+    if isinstance(item, QtSvg.QGraphicsSvgItem):
+        # the renderers are shared by file, see Image.renderer()
+        return item.renderer()
+    return type(item).__name__
+
+
+def _blur(image: QtGui.QImage, radius) -> QtGui.QImage:
+    # the blur of Qt is only available to graphics items
+    scene = QtWidgets.QGraphicsScene()
+    item = scene.addPixmap(QtGui.QPixmap.fromImage(image))
+    effect = QtWidgets.QGraphicsBlurEffect()
+    effect.setBlurRadius(radius / BLUR_RADIUS_SCALE)
+    item.setGraphicsEffect(effect)
+    result = QtGui.QImage(image.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+    result.fill(0)
+    painter = QtGui.QPainter(result)
+    scene.render(painter, QtCore.QRectF(result.rect()), QtCore.QRectF(image.rect()))
+    painter.end()
+    return result
+
+
+log = logging.getLogger(__name__)
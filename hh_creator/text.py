@@ -1,19 +1,30 @@
 import logging
 import time
 import typing
+from collections import OrderedDict
+from functools import cache
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 from . import config
+from .clock import Clock, Timer
 from .config import RESOURCE_PATH
+from .core.amounts import amount_format, decimal_conversion
 from .dialog import NameDialog, StackDialog
-from .util import amount_format, decimal_conversion
 
 
 class TextItem(QtWidgets.QGraphicsTextItem):
     n_decimals = 1
 
     _fontstr = None
+    # bounding rect sizes, by font and text, least recently used first: the
+    # widths of the amounts are needed at every change, and many of them come
+    # back again and again
+    MAX_MEASURED = 4096
+    _sizes: typing.ClassVar[OrderedDict[typing.Tuple[str, str], QtCore.QSizeF]] = (
+        OrderedDict()
+    )
+    _measuring_item = None
 
     def __init__(
         self,
@@ -31,10 +42,7 @@ class TextItem(QtWidgets.QGraphicsTextItem):
         **kwa,
     ):
         super().__init__(*a, **kwa)
-        if self._fontstr is None:
-            _load_font()
-        font = QtGui.QFont(self._fontstr, point_size, weight, italic)
-        self.setFont(font)
+        self.set_font(point_size, weight, italic)
         self.setDefaultTextColor(QtGui.QColor(color))
         self.set_center(0, 0)
         self.prefix = prefix
@@ -48,6 +56,9 @@ class TextItem(QtWidgets.QGraphicsTextItem):
         self.currency = currency
         self.currency_is_after = currency_is_after
 
+    def set_font(self, point_size, weight, italic=False):
+        self.setFont(_font(point_size, weight, italic))
+
     def point_size(self):
         return self.font().pointSize()
 
@@ -76,8 +87,17 @@ class TextItem(QtWidgets.QGraphicsTextItem):
             self.setVisible(False)
         else:
             self.setVisible(True)
-        old_width = self.boundingRect().width()
+        old_text = self.toPlainText()
         self._content = value
+        text = self.format_content(value)
+        if text == old_text:
+            return
+        old_width = self.text_size(old_text).width()
+        self.setPlainText(text)
+        new_width = self.text_size(text).width()
+        super().moveBy((old_width - new_width) / 2, 0)
+
+    def format_content(self, value) -> str:
         text = self.prefix
         if not self.currency_is_after:
             text += self.currency
@@ -88,23 +108,36 @@ class TextItem(QtWidgets.QGraphicsTextItem):
         if self.currency_is_after:
             text += self.currency
         text += self.postfix
-        self.setPlainText(text)
-        new_width = self.boundingRect().width()
-        super().moveBy((old_width - new_width) / 2, 0)
+        return text
+
+    def text_size(self, text) -> QtCore.QSizeF:
+        """The size of the bounding rect of the item when showing text."""
+        key = (self.font().key(), text)
+        try:
+            size = self._sizes[key]
+        except KeyError:
+            pass
+        else:
+            self._sizes.move_to_end(key)
+            return size
+        item = TextItem._measuring_item
+        if item is None:
+            item = TextItem._measuring_item = QtWidgets.QGraphicsTextItem()
+        item.setFont(self.font())
+        item.setPlainText(text)
+        size = item.boundingRect().size()
+        self._sizes[key] = size
+        while len(self._sizes) > self.MAX_MEASURED:
+            self._sizes.popitem(last=False)
+        return size
 
     def get_pos_if_content(self, content):
-        item = TextItem(
-            postfix=self.postfix,
-            prefix=self.prefix,
-            currency_is_after=self.currency_is_after,
-            currency=self.currency,
-            **self.font_kwargs(),
-            content_is_number=self.content_is_number,
-        )
-        item.set_center(self.sceneBoundingRect().center())
-        item.content = content
-        # self.scene().addItem(item)
-        return item.scenePos()
+        """The position of the item centered on this one, showing content."""
+        center = self.sceneBoundingRect().center()
+        # centered while empty, then widened from the middle
+        width = self.text_size(self.format_content(content)).width()
+        height = self.text_size("").height()
+        return QtCore.QPointF(center.x() - width / 2, center.y() - height / 2)
 
     def set_center(
         self,
@@ -124,14 +157,13 @@ class TextItem(QtWidgets.QGraphicsTextItem):
 
 
 class StackItem(QtWidgets.QGraphicsItemGroup):
-    def __init__(self, *a, **kw):
+    def __init__(self, clock: Clock, *a, **kw):
         super().__init__(*a, **kw)
         self.stack_item = TextItem(hide_if_empty=False, content_is_number=True)
         self.action_item = TextItem()
         self.addToGroup(self.stack_item)
         self.addToGroup(self.action_item)
-        self.timer = QtCore.QTimer()
-        self.timer.setSingleShot(True)
+        self.timer = Timer(clock)
 
     @property
     def stack(self):
@@ -191,6 +223,13 @@ class NameItem(TextItem):
             self.content = dialog.widgets["lineEdit"].text()
 
 
+@cache
+def _font(point_size, weight, italic):
+    if TextItem._fontstr is None:
+        _load_font()
+    return QtGui.QFont(TextItem._fontstr, point_size, weight, italic)
+
+
 def _load_font():
     _id = QtGui.QFontDatabase.addApplicationFont(str(RESOURCE_PATH / "Lato-Black.ttf"))
     _fontstr = QtGui.QFontDatabase.applicationFontFamilies(_id)
@@ -1,65 +1,181 @@
 import logging
-from decimal import Decimal, InvalidOperation
-from enum import Enum
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import ClassVar, Dict, Union
 
-from PyQt5 import Qt, QtCore, QtGui, QtWidgets, uic
+from PyQt5 import Qt, QtCore, QtGui, QtSvg, QtWidgets, uic
 
-from .config import RESOURCE_PATH
-from .poker_enum import PokerEnum
+from .config import RESOURCE_PATH, config
+from .core.enums import ActionType
 
 log = logging.getLogger(__name__)
 
 
-class ActionType(PokerEnum):
-    ANTE = ("post ante",)
-    SB = ("post SB",)
-    BB = ("post BB",)
-    BET = "bet", "bets"
-    RAISE = "raise", "raises"
-    CHECK = "check", "checks"
-    FOLD = "fold", "folded", "folds"
-    CALL = "call", "calls"
-    RETURN = "return", "returned", "uncalled"
-    WIN = "win", "won", "collected"
-    SHOW = ("show",)
-    MUCK = "don't show", "didn't show", "did not show", "mucks"
-    THINK = ("seconds left to act",)
-    STRADDLE = ("straddle",)
-
-
-class IncrementableEnum(Enum):
-    def next(self):
-        return self.__class__(self._value_ + 1)
-
-    def prev(self):
-        return self.__class__(self._value_ - 1)
-
-    def __str__(self):
-        return self._name_
-
-    def __gt__(self, other):
-        return self._value_ > other._value_
-
-    def __sub__(self, other):
-        return self._value_ - other._value_
-
-
 class Image:
     IMG_PATH = RESOURCE_PATH / "img"
 
+    # Each SVG file is parsed once into a renderer shared by all the items
+    # showing it. Items keep a reference to their renderer, so invalidating
+    # only affects the items created afterwards.
+    _renderers: ClassVar[Dict[Path, QtSvg.QSvgRenderer]] = {}
+    hits = 0
+    misses = 0
+
+    # Decoded PNG files, least recently used first, within a memory budget.
+    # Prefetched files are decoded on a worker thread (QPixmap only exists in
+    # the GUI thread) and added to the cache when they are first asked for.
+    # Until then they count in the budget too, and are the first evicted.
+    _pixmaps: ClassVar[OrderedDict[Path, QtGui.QPixmap]] = OrderedDict()
+    _pixmap_bytes = 0
+    max_pixmap_bytes = config["look"].getint("image_cache_mb") * 1024 * 1024
+    _prefetched: ClassVar[Dict[Path, Future]] = {}
+    # the size of the prefetched PNG files once decoded, oldest first
+    _prefetched_bytes: ClassVar[OrderedDict[Path, int]] = OrderedDict()
+    _executor = None
+
     @staticmethod
     def get(filename, parent=None):
-        path = Image.IMG_PATH / f"{filename}"
-        if path.with_suffix(".svg").exists():
-            log.debug(f"Loading {path}")
-            item = Qt.QGraphicsSvgItem(str(path.with_suffix(".svg")), parent)
+        renderer = Image.renderer(filename)
+        if renderer is not None:
+            item = Qt.QGraphicsSvgItem(parent)
+            item.setSharedRenderer(renderer)
             return item
-        elif path.with_suffix(".png").exists():
+        return Qt.QGraphicsPixmapItem(Image.pixmap(filename))
+
+    @classmethod
+    def pixmap(cls, filename) -> QtGui.QPixmap:
+        """The decoded PNG image, from the cache when possible."""
+        path = (cls.IMG_PATH / f"{filename}").with_suffix(".png")
+        try:
+            pixmap = cls._pixmaps[path]
+        except KeyError:
+            pass
+        else:
+            cls.hits += 1
+            cls._pixmaps.move_to_end(path)
+            return pixmap
+        cls.misses += 1
+        future = cls._prefetched.pop(path, None)
+        cls._prefetched_bytes.pop(path, None)
+        if future is not None:
+            image = future.result()
+        else:
             log.debug(f"Loading {path}")
-            img = QtGui.QPixmap(str(path.with_suffix(".png")), parent)
-            return Qt.QGraphicsPixmapItem(img)
+            image = QtGui.QImage(str(path))
+        if image.isNull():
+            raise FileNotFoundError(path)
+        pixmap = QtGui.QPixmap.fromImage(image)
+        cls._pixmaps[path] = pixmap
+        cls._pixmap_bytes += cls._n_bytes(pixmap)
+        # the prefetched images may never be asked for
+        while cls._prefetched_bytes and cls._cached_bytes() > cls.max_pixmap_bytes:
+            cls._forget_prefetched(next(iter(cls._prefetched_bytes)))
+        # keeps the image just loaded, even if it is larger than the budget
+        while cls._pixmap_bytes > cls.max_pixmap_bytes and len(cls._pixmaps) > 1:
+            evicted, old = cls._pixmaps.popitem(last=False)
+            cls._pixmap_bytes -= cls._n_bytes(old)
+            log.debug(f"Evicting {evicted}")
+        return pixmap
+
+    @classmethod
+    def prefetch(cls, *filenames):
+        """Decodes PNG images in the background, for pixmap() to return them."""
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(1, thread_name_prefix="prefetch")
+        for filename in filenames:
+            svg = (cls.IMG_PATH / f"{filename}").with_suffix(".svg")
+            png = svg.with_suffix(".png")
+            if svg in cls._renderers or png in cls._pixmaps or svg in cls._prefetched:
+                continue
+            if svg.exists():
+                cls._prefetched[svg] = cls._executor.submit(cls._load_renderer, svg)
+            elif png.exists() and png not in cls._prefetched:
+                # read from the header, without decoding
+                size = QtGui.QImageReader(str(png)).size()
+                n_bytes = size.width() * size.height() * 4
+                if cls._cached_bytes() + n_bytes > cls.max_pixmap_bytes:
+                    log.debug(f"Not prefetching {png}, over the budget")
+                    continue
+                cls._prefetched[png] = cls._executor.submit(QtGui.QImage, str(png))
+                cls._prefetched_bytes[png] = n_bytes
+
+    @classmethod
+    def _forget_prefetched(cls, path):
+        future = cls._prefetched.pop(path, None)
+        cls._prefetched_bytes.pop(path, None)
+        if future is not None:
+            future.cancel()
+            log.debug(f"Forgetting prefetched {path}")
+
+    @classmethod
+    def _cached_bytes(cls):
+        return cls._pixmap_bytes + sum(cls._prefetched_bytes.values())
+
+    @staticmethod
+    def _load_renderer(path):
+        renderer = QtSvg.QSvgRenderer(str(path))
+        # created in the worker thread, but used by the items of the GUI thread
+        renderer.moveToThread(QtCore.QCoreApplication.instance().thread())
+        return renderer
+
+    @staticmethod
+    def _n_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    @classmethod
+    def renderer(cls, filename) -> Union[QtSvg.QSvgRenderer, None]:
+        """The shared renderer of an SVG image, None if there is no such file."""
+        path = (cls.IMG_PATH / f"{filename}").with_suffix(".svg")
+        try:
+            renderer = cls._renderers[path]
+        except KeyError:
+            pass
+        else:
+            cls.hits += 1
+            return renderer
+        future = cls._prefetched.pop(path, None)
+        if future is None and not path.exists():
+            return None
+        cls.misses += 1
+        if future is not None:
+            renderer = future.result()
         else:
-            raise FileNotFoundError
+            log.debug(f"Loading {path}")
+            renderer = QtSvg.QSvgRenderer(str(path))
+        cls._renderers[path] = renderer
+        return renderer
+
+    @classmethod
+    def invalidate(cls, *filenames):
+        """Forgets the images of filenames, or all of them if none is given."""
+        if not filenames:
+            cls._renderers.clear()
+            cls._pixmaps.clear()
+            cls._pixmap_bytes = 0
+            for path in list(cls._prefetched):
+                cls._forget_prefetched(path)
+        for filename in filenames:
+            svg = (cls.IMG_PATH / f"{filename}").with_suffix(".svg")
+            png = svg.with_suffix(".png")
+            cls._renderers.pop(svg, None)
+            pixmap = cls._pixmaps.pop(png, None)
+            if pixmap is not None:
+                cls._pixmap_bytes -= cls._n_bytes(pixmap)
+            for path in (svg, png):
+                cls._forget_prefetched(path)
+
+    @classmethod
+    def cache_info(cls):
+        return {
+            "hits": cls.hits,
+            "misses": cls.misses,
+            "size": len(cls._renderers),
+            "pixmaps": len(cls._pixmaps),
+            "pixmap_bytes": cls._pixmap_bytes,
+            "prefetched": len(cls._prefetched),
+            "prefetched_bytes": sum(cls._prefetched_bytes.values()),
+        }
 
 
 class AutoUI:
@@ -103,24 +219,6 @@ class IntValidator(QtGui.QIntValidator):
         self.setBottom(1)
 
 
-def decimal_conversion(text):
-    if isinstance(text, Decimal):
-        return text
-    try:
-        return Decimal(text.replace(",", "."))
-    except InvalidOperation:
-        log.warning(f"Error converting {text} to decimal, returning 0")
-        return Decimal(0)
-
-
-def int_conversion(text):
-    try:
-        return int(text)
-    except InvalidOperation:
-        log.warning(f"Error converting {text} to int, returning 0")
-        return 0
-
-
 def barycenter(x1, y1, x2, y2, w1=1, w2=2):
     return (w1 * x1 + w2 * x2) / (w1 + w2), (w1 * y1 + w2 * y2) / (w1 + w2)
 
@@ -136,29 +234,24 @@ def get_center(item, scene=False):
     return [x + rect.x(), y + rect.y()]
 
 
-def amount_format(x, n_decimals=3):
-    if not isinstance(x, Decimal):
-        x = Decimal(str(x))  # Convert to Decimal to avoid precision issues
-
-    x = round(x, n_decimals)
-
-    # Normalize the number by removing trailing zeroes.
-    # "f" prevents scientific notation.
-    return format(x.normalize(), "f")
-
+class _Silence:
+    def play(self):
+        pass
 
-BLINDS = [ActionType.SB, ActionType.BB, ActionType.STRADDLE]
 
+def init_sounds(muted=False):
+    if muted:
+        # offscreen export, where nothing is heard
+        _sounds = defaultdict(_Silence)
+    else:
+        # we need to import it here or else tests cannot be played in CI:
+        # ImportError: libpulse-mainloop-glib.so.0: cannot open shared object file: No such file or directory
+        from PyQt5 import QtMultimedia
 
-def init_sounds():
-    # we need to import it here or else tests cannot be played in CI:
-    # ImportError: libpulse-mainloop-glib.so.0: cannot open shared object file: No such file or directory
-    from PyQt5 import QtMultimedia
-
-    _sounds = {
-        f.stem: QtMultimedia.QSound(str(f))
-        for f in (RESOURCE_PATH / "sounds").glob("*.wav")
-    }
+        _sounds = {
+            f.stem: QtMultimedia.QSound(str(f))
+            for f in (RESOURCE_PATH / "sounds").glob("*.wav")
+        }
 
     sounds.update(
         {
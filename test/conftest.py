@@ -0,0 +1,90 @@
+import os
+from decimal import Decimal
+
+import pytest
+from PyQt5 import QtCore, QtWidgets
+
+from hh_creator.core import codec
+from hh_creator.core.hh import ActionType, HandHistory
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# created before the test modules are imported: the scene tests need a
+# QApplication, the modules creating a QCoreApplication then reuse it
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+@pytest.fixture
+def new_hh():
+    """Makes hands with blinds of 0.5/1, posted, and stacks of 100 by default."""
+
+    def new_hh(stacks=(100, 100, 100, 100), **kw):
+        hh = HandHistory(
+            stacks=[Decimal(s) for s in stacks],
+            small_blind=Decimal("0.5"),
+            big_blind=Decimal(1),
+            **kw,
+        )
+        hh.post_blinds_and_antes()
+        return hh
+
+    return new_hh
+
+
+class Window(QtCore.QObject):
+    """What the table scene asks of the main window."""
+
+    def __init__(self, hand_history):
+        super().__init__()
+        self.hand_history = hand_history
+
+    def update_buttons(self):
+        pass
+
+    def hide_cards_before_showdown(self):
+        return False
+
+
+@pytest.fixture
+def hand(new_hh):
+    """
+    A hand of 4 players going to the flop, as the dictionary of its file and
+    as a HandHistory.
+    """
+    hand_history = new_hh()
+    hand_history.add_action(ActionType.RAISE, Decimal(2))
+    hand_history.add_action(ActionType.FOLD)
+    hand_history.add_action(ActionType.CALL)
+    hand_history.add_action(ActionType.CALL)
+    hand_history.add_action(ActionType.BET, Decimal(5))
+    hand_history.add_action(ActionType.CALL)
+    hh_dict = codec.hand_to_dict(hand_history)
+    hh_dict.update(
+        n_decimals=1,
+        player_names=["a", "b", "c", "d"],
+        n_seats=6,
+        n_cards=2,
+        active_seats=[0, 1, 2, 3],
+        button_idx=0,
+        hero=0,
+        hands=[["As", "Ad"], ["Ks", "Kd"], ["Qs", "Qd"], ["Js", "Jd"]],
+        board=["2c", "3c", "4d", "9h", "Th"],
+        currency="€",
+        currency_is_after=True,
+    )
+    return hh_dict, hand_history
+
+
+@pytest.fixture
+def table_scene(hand, monkeypatch):
+    """A scene loaded with the hand, the HandHistory in scene.parent()."""
+    from hh_creator.card import CardItem
+    from hh_creator.scene import TableScene
+
+    # the application has a single scene, and resets the cards of all
+    monkeypatch.setattr(CardItem, "instances", [])
+    hh_dict, hand_history = hand
+    # the parent of the scene, kept alive with it
+    window = Window(hand_history)
+    scene = TableScene(window)
+    scene.load_dict(hh_dict, hand_history)
+    yield scene
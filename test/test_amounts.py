@@ -0,0 +1,11 @@
+from decimal import Decimal
+
+from hh_creator.core import amounts
+
+
+def test_format_amount():
+    assert amounts.amount_format(Decimal("1.325"), 3) == "1.325"
+    assert amounts.amount_format(2, 3) == "2"
+    assert amounts.amount_format(Decimal(0.5), 3) == "0.5"
+    assert amounts.amount_format(Decimal("0.500"), 3) == "0.5"
+    assert amounts.amount_format(Decimal("100")) == "100"  # not 1E+2BB
@@ -0,0 +1,85 @@
+from PyQt5 import QtCore, QtWidgets
+
+from hh_creator.animations import Animations
+from hh_creator.text import TextItem
+
+app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+class Target(QtCore.QObject):
+    def __init__(self):
+        super().__init__()
+        self._x = 0.0
+
+    def get_x(self):
+        return self._x
+
+    def set_x(self, x):
+        self._x = x
+
+    x = QtCore.pyqtProperty(float, get_x, set_x)
+
+
+def test_coalescing():
+    animations = Animations(QtCore.QObject())
+    clock = animations.clock
+    clock.set_manual()
+    a, b = Target(), Target()
+    done = []
+    animations.animate(a, b"x", 100.0, 100)
+    animations.animate(b, b"x", 100.0, 100, callbacks=[lambda: done.append(1)])
+    # replaces the first animation of b
+    animations.animate(b, b"x", 50.0, 200, callbacks=[lambda: done.append(2)])
+    animations.start()
+    assert animations.n_live() == 2
+
+    clock.tick(100)
+    assert (a.x, b.x) == (100, 25)
+    assert animations.n_live() == 1
+    animations.animate(b, b"x", 0.0, 100)
+    animations.start()
+    assert done == []
+
+    # goes on from where the running one is
+    clock.tick(50)
+    assert b.x == 12.5
+    clock.flush()
+    assert b.x == 0
+    assert done == [1, 2]
+    assert animations.n_live() == 0
+
+    # the finished animations are reused, two were needed
+    animations.animate(a, b"x", 0.0, 100)
+    animations.start()
+    assert len(animations._free_animations) == 1
+    assert len(animations.scene.findChildren(QtCore.QPropertyAnimation)) == 2
+    clock.flush()
+    assert a.x == 0
+
+
+def test_pools(monkeypatch):
+    monkeypatch.setattr(Animations, "MAX_POOLED", 1)
+    scene = QtWidgets.QGraphicsScene()
+    animations = Animations(scene)
+    animations.clock.set_manual()
+    source, target = TextItem(), TextItem()
+    scene.addItem(source)
+    scene.addItem(target)
+    target.content = "x"
+    for _ in range(2):
+        animations.text(source, target, 100, content="y")
+    # not started: the animations and the text items go back to the pools
+    animations.reset()
+    assert len(animations._free_animations) == len(animations._text_items) == 1
+    app.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    assert len(animations.scene.findChildren(QtCore.QPropertyAnimation)) == 1
+
+    animations.text(source, target, 100, content="y")
+    animations.text(source, target, 100, content="z")
+    assert not animations._text_items
+    animations.start()
+    animations.clock.flush()
+    assert len(animations._text_items) == 1
+    assert all(item.scene() is None for item in animations._text_items)
+    app.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    assert len(scene.findChildren(QtCore.QPropertyAnimation)) == 1
@@ -0,0 +1,65 @@
+import math
+from pathlib import Path
+
+import pytest
+from PyQt5 import QtCore, QtGui
+
+from hh_creator import config
+from hh_creator.atlas import CardAtlas
+
+CARDS = Path("cards")
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_dir", tmp_path)
+    monkeypatch.setattr(CardAtlas, "_atlases", {})
+    return tmp_path
+
+
+def test_source_rect(cache_dir):
+    atlas = CardAtlas(CARDS, 0.1, 1)
+    assert len(atlas.names) == 54
+    w, h = atlas.tile_size.width(), atlas.tile_size.height()
+    assert (w, h) == (
+        math.ceil(atlas.size.width() * 0.1),
+        math.ceil(atlas.size.height() * 0.1),
+    )
+    pad = CardAtlas.PADDING
+    names = atlas.names
+    assert atlas.source_rect(names[0]) == QtCore.QRectF(pad, pad, w, h)
+    assert atlas.source_rect(names[14]) == QtCore.QRectF(w + 3 * pad, h + 3 * pad, w, h)
+    assert atlas.source_rect(names[-1]).bottom() <= atlas.pixmap.height() - pad
+
+    image = atlas.pixmap.toImage()
+    rect = atlas.source_rect("As").toRect()
+    assert image.pixelColor(rect.center()).alpha() == 255
+    # the padding between the tiles
+    assert image.pixelColor(rect.right() + pad, rect.center().y()).alpha() == 0
+
+
+def test_disk_cache(cache_dir, monkeypatch):
+    atlas = CardAtlas.get(CARDS, 0.1)
+    assert CardAtlas.get(CARDS, 0.1) is atlas
+    assert atlas.filename.parent == cache_dir
+    assert atlas.filename.exists()
+    # another resolution has a file of its own
+    assert CardAtlas(CARDS, 0.2, 1).filename != atlas.filename
+    assert len(list(cache_dir.glob("atlas-cards-*.png"))) == 2
+
+    def render(self):
+        raise AssertionError("rendered again")
+
+    monkeypatch.setattr(CardAtlas, "_render", render)
+    loaded = CardAtlas(CARDS, 0.1, 1).pixmap.toImage()
+    assert loaded == atlas.pixmap.toImage().convertToFormat(loaded.format())
+
+
+def test_wrong_size(cache_dir):
+    atlas = CardAtlas(CARDS, 0.1, 1)
+    image = QtGui.QImage(10, 10, QtGui.QImage.Format_ARGB32)
+    image.fill(0)
+    image.save(str(atlas.filename))
+    # rendered and written again
+    assert CardAtlas(CARDS, 0.1, 1).pixmap.size() == atlas.pixmap.size()
+    assert QtGui.QImage(str(atlas.filename)).size() == atlas.pixmap.size()
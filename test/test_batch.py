@@ -0,0 +1,55 @@
+import pytest
+
+from hh_creator import batch
+from hh_creator.batch import Manifest, _publish
+from hh_creator.core import codec
+
+
+def test_manifest(tmp_path):
+    filename = tmp_path / "manifest.json"
+    manifest = Manifest(filename, {"fps": 30})
+    manifest.record("a.hh", status="done", sha1="1", frames=10)
+    manifest.record("b.hh", status="failed", sha1="2")
+
+    manifest = Manifest(filename, {"fps": 30})
+    assert manifest.is_done("a.hh", "1")
+    assert not manifest.is_done("a.hh", "modified")
+    assert not manifest.is_done("b.hh", "2")
+    assert not manifest.is_done("c.hh", "3")
+
+    assert not Manifest(filename, {"fps": 60}).is_done("a.hh", "1")
+
+
+def test_publish(tmp_path):
+    output = tmp_path / "hand"
+    output.mkdir()
+    for i in range(3):
+        (output / f"frame-{i:06d}.png").write_bytes(b"old")
+    partial = tmp_path / "hand.part"
+    partial.mkdir()
+    for i in range(2):
+        (partial / f"frame-{i:06d}.png").write_bytes(b"new")
+
+    _publish(partial, output)
+    assert not partial.exists()
+    assert sorted(p.name for p in output.iterdir()) == [
+        "frame-000000.png",
+        "frame-000001.png",
+    ]
+    assert (output / "frame-000000.png").read_bytes() == b"new"
+
+
+def test_render_y4m(tmp_path, hand):
+    pytest.importorskip("numpy")
+    hands_dir = tmp_path / "hands"
+    hands_dir.mkdir()
+    with (hands_dir / "hand.hh").open("w", encoding="utf-8") as fp:
+        codec.dump(hand[0], fp)
+    output_dir = tmp_path / "videos"
+    args = [str(hands_dir), str(output_dir), "--y4m", "-j", "1", "--size", "64x36"]
+
+    assert batch.main(args) == 0
+    output = output_dir / "hand.y4m"
+    assert output.is_file()
+    assert output.read_bytes().startswith(b"YUV4MPEG2 W64 H36")
+    assert sorted(p.name for p in output_dir.iterdir()) == ["hand.y4m", "manifest.json"]
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import pytest
+
+from hh_creator import config
+from hh_creator.card import CardItem, CardLook
+from hh_creator.util import Image
+
+RED = Path("cards") / "back-red"
+BLUE = Path("cards") / "back-blue"
+
+
+@pytest.fixture
+def renderers(monkeypatch):
+    """Cards drawn by the shared renderers, with an empty cache."""
+    monkeypatch.setitem(config.config["look"], "card_atlas", "false")
+    monkeypatch.setitem(config.config["look"], "card-back", "red")
+    monkeypatch.setattr(config, "save_config", lambda: None)
+    monkeypatch.setattr(CardLook, "instances", [])
+    monkeypatch.setattr(Image, "_renderers", {})
+    monkeypatch.setattr(Image, "hits", 0)
+    monkeypatch.setattr(Image, "misses", 0)
+
+
+def test_cache_info(renderers):
+    cards = [CardItem(), CardItem(crop_bottom=True), CardItem()]
+    assert cards[0].back.renderer() is cards[2].back.renderer()
+    assert cards[0].back.renderer() is not cards[1].back.renderer()
+    info = Image.cache_info()
+    assert (info["hits"], info["misses"], info["size"]) == (1, 2, 2)
+    assert Image.renderer("missing") is None
+    assert Image.cache_info()["misses"] == 2
+
+
+def test_change_back(renderers):
+    card = CardItem()
+    red = Image.renderer(RED)
+    CardItem.change_back("blue")
+    assert card.back.renderer() is Image.renderer(BLUE)
+    assert config.config["look"]["card-back"] == "blue"
+    # the old back is loaded again when needed
+    assert (Image.IMG_PATH / RED).with_suffix(".svg") not in Image._renderers
+    assert Image.renderer(RED) is not red
@@ -0,0 +1,82 @@
+from PyQt5 import QtCore
+
+from hh_creator.clock import Clock, Timer
+
+app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def new_animation(values):
+    animation = QtCore.QVariantAnimation()
+    animation.setStartValue(0.0)
+    animation.setEndValue(100.0)
+    animation.setDuration(200)
+    animation.valueChanged.connect(values.append)
+    return animation
+
+
+def test_manual_clock():
+    clock = Clock()
+    clock.set_manual()
+    values = []
+    fired = []
+    timer = Timer(clock)
+    timer.timeout.connect(lambda: fired.append(clock.now))
+
+    clock.start_animation(new_animation(values))
+    timer.start(150)
+    clock.tick(100)
+    assert values[-1] == 50
+    assert timer.isActive() and not fired
+
+    clock.tick(1000)
+    assert values[-1] == 100
+    assert fired == [150]
+    assert not timer.isActive()
+    assert clock.is_idle()
+
+    timer.start(1500)
+    clock.start_animation(new_animation(values))
+    clock.flush()
+    assert values[-1] == 100
+    assert fired == [150, 2600]
+
+
+def test_fractional_time():
+    clock = Clock()
+    clock.set_manual()
+    # as left by the ticks of the wall clock
+    clock.now = 500.00000000000006
+    values = []
+    clock.start_animation(new_animation(values))
+    clock.flush()
+    assert values[-1] == 100
+    assert clock.is_idle()
+
+
+def test_clocks_are_independent():
+    playing, exported = Clock(time_scale=1), Clock()
+    values = []
+    playing.start_animation(new_animation(values))
+    exported.set_manual()
+    exported.start_animation(new_animation([]))
+    exported.flush()
+    assert not playing.is_idle()
+    playing.flush()
+    assert values[-1] == 100
+
+
+def test_time_scale():
+    clock = Clock(time_scale=10)
+    values = []
+    clock.start_animation(new_animation(values))
+    timer = QtCore.QElapsedTimer()
+    timer.start()
+    while not clock.is_idle() and timer.elapsed() < 1000:
+        app.processEvents()
+    assert values[-1] == 100
+    assert timer.elapsed() < 150
+
+    clock.set_time_scale(0)
+    clock.start_animation(new_animation(values))
+    app.processEvents()
+    assert clock.is_idle()
@@ -0,0 +1,64 @@
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from hh_creator.core import codec
+from hh_creator.core.hh import ActionType, HandHistory
+
+LEGACY_FILE = {
+    "small_blind": {"decimal": "0.05"},
+    "big_blind": {"decimal": "0.1"},
+    "actions": [
+        {"type": "post SB", "amount": {"decimal": "0.05"}},
+        {"type": "post BB", "amount": {"decimal": "0.1"}},
+        {"type": "fold", "amount": None},
+    ],
+    "ante": {"decimal": "0"},
+    "bb_ante": None,
+    "players": [{"decimal": "10"}, {"decimal": "12.5"}],
+    "current_street": None,
+    "current_player": None,
+    "total_pot": {"decimal": "0.15"},
+    "winner": {"decimal": "12.5"},
+    "n_straddle": 0,
+    "largest_blind": {"decimal": "0.1"},
+}
+
+
+def test_round_trip():
+    hh = HandHistory(
+        stacks=[Decimal(100), Decimal("50.5"), Decimal(100)], small_blind=Decimal(1)
+    )
+    hh.post_blinds_and_antes()
+    hh.add_action(ActionType.RAISE, Decimal(4))
+    hh.add_action(ActionType.CALL)
+    hh.add_action(ActionType.FOLD)
+    obj = hh.to_dict()
+    assert obj["version"] == codec.FORMAT_VERSION
+    assert obj["players"] == [100, Decimal("50.5"), 100]
+    assert obj["actions"][-3] == {"type": "raise", "amount": 4}
+
+    obj["n_decimals"] = 1
+    fp = io.StringIO()
+    codec.dump(obj, fp)
+    fp.seek(0)
+    assert codec.load(fp) == obj
+    assert HandHistory.from_json(hh.to_json()).to_dict() == hh.to_dict()
+
+
+def test_legacy_file():
+    obj = codec.loads(json.dumps(LEGACY_FILE))
+    assert obj["version"] == codec.FORMAT_VERSION
+    assert obj["n_decimals"] == 2
+    assert obj["small_blind"] == Decimal("0.05")
+    assert obj["winner"] == Decimal("12.5")
+    hh = HandHistory.from_dict(obj)
+    assert hh.total_pot == Decimal("0.15")
+    assert hh.winner.stack == Decimal("12.4")
+
+
+def test_newer_version():
+    with pytest.raises(codec.UnsupportedVersion):
+        codec.loads(json.dumps(dict(LEGACY_FILE, version=codec.FORMAT_VERSION + 1)))
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+from hh_creator.core import evaluator
+
+
+def test_winners():
+    board = ["Ah", "Kh", "7c", "7d", "2s"]
+    assert evaluator.winners([["Ac", "3d"], ["Kc", "Qd"]], board) == [0]
+    assert evaluator.winners([["Ac", "3d"], ["As", "4d"]], board) == [0, 1]
+    # omaha: two hole cards must be used, the hearts flush is not there
+    assert evaluator.winners(
+        [["Qh", "Jh", "3c", "4c"], ["7s", "8s", "9s", "Ts"]], board
+    ) == [1]
+
+
+def test_core_is_headless():
+    code = (
+        "import sys, hh_creator.core.hh, hh_creator.core.evaluator;"
+        "assert 'PyQt5' not in sys.modules;"
+        "assert 'hh_creator.config' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
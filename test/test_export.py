@@ -0,0 +1,30 @@
+import io
+
+import pytest
+
+from hh_creator.export import ExportSettings, PngSequence, Y4mStream, open_writer
+
+SETTINGS = ExportSettings(width=4, height=2, fps=10)
+
+
+def test_y4m_files_are_closed(tmp_path):
+    pytest.importorskip("numpy")
+    writer = open_writer(str(tmp_path / "hand.y4m"), SETTINGS)
+    writer.close()
+    assert writer.fp.closed
+    assert (tmp_path / "hand.y4m").read_bytes().startswith(b"YUV4MPEG2 W4 H2")
+
+    # the standard output is left open
+    fp = io.BytesIO()
+    Y4mStream(fp, SETTINGS).close()
+    assert not fp.closed
+
+    with pytest.raises(ValueError):
+        open_writer(str(tmp_path / "odd.y4m"), ExportSettings(width=3, height=2))
+
+
+def test_png_threads(tmp_path):
+    writer = open_writer(str(tmp_path / "frames"), SETTINGS, n_threads=2)
+    assert isinstance(writer, PngSequence)
+    assert writer.n_threads == 2
+    writer.close()
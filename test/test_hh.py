@@ -0,0 +1,216 @@
+from decimal import Decimal
+
+import pytest
+
+from hh_creator.core.hh import (
+    ActionLog,
+    ActionType,
+    HandHistory,
+    InvalidAmount,
+    Player,
+    Position,
+    Street,
+)
+
+
+def test_at_action(new_hh):
+    hh = new_hh()
+    hh.add_action(ActionType.RAISE, Decimal(2))
+    hh.add_action(ActionType.CALL)
+    hh.add_action(ActionType.FOLD)
+    hh.add_action(ActionType.CALL)
+    hh.add_action(ActionType.BET, Decimal(5))
+
+    start = hh.at_action(-1)
+    assert start.actions == []
+    assert start.total_pot == 0
+    assert all(p.stack == 100 for p in start.players)
+
+    blinds = hh.at_action(0)
+    assert blinds.current_street == Street.PRE_FLOP
+    assert blinds.current_player.position == Position.UTG
+    assert blinds.total_pot == Decimal("1.5")
+    assert blinds.current_player_amount_to_call() == 1
+
+    flop = hh.at_action(4)
+    assert flop.current_street == Street.FLOP
+    assert flop.total_pot == Decimal("9.5")
+    assert flop.get_player_by_position(Position.BTN).stack == 97
+    assert flop.get_player_by_position(Position.SB).has_folded()
+
+    assert hh.at_action(5) is hh
+    assert hh.at_action(4) is flop
+
+    hh.remove_last_action()
+    assert hh.at_action(4) is hh
+    assert hh.at_action(3) is hh.at_action(3)
+    assert hh.at_action(3).current_player.position == Position.BB
+
+
+def test_action_log(new_hh):
+    hh = new_hh()
+    hh.add_action(ActionType.RAISE, Decimal(2))
+    hh.add_action(ActionType.FOLD)
+    assert isinstance(hh.actions, ActionLog)
+    assert [a.action_type for a in hh.actions[2:]] == [
+        ActionType.RAISE,
+        ActionType.FOLD,
+    ]
+    raise_ = hh.actions[2]
+    assert raise_.player is hh.get_player_by_position(Position.UTG)
+    assert raise_.street == Street.PRE_FLOP
+    assert raise_.added_to_pot == 3
+    assert raise_ == hh.get_player_by_position(Position.UTG).last_action
+    assert hh.get_player_by_position(Position.BTN).has_folded()
+
+    hh.remove_last_action()
+    assert hh.actions[-1] == raise_
+    assert hh.get_player_by_position(Position.BTN).last_action.action_type is None
+
+
+def test_running_totals(monkeypatch, new_hh):
+    monkeypatch.setattr(Player, "check_consistency", True)
+    hh = new_hh(ante=Decimal("0.1"))
+    sb = hh.get_player_by_position(Position.SB)
+    bb = hh.get_player_by_position(Position.BB)
+    assert sb.street_bet(Street.ANTE) == 0
+    assert sb.street_bet(Street.PRE_FLOP) == Decimal("0.5")
+    assert sb.invested_in_pot() == Decimal("0.6")
+
+    hh.add_action(ActionType.RAISE, Decimal(2))
+    hh.add_action(ActionType.CALL)
+    hh.add_action(ActionType.CALL)
+    assert sb.street_bet() == 3
+    assert bb.has_not_played_for_street(Street.FLOP)
+    hh.add_action(ActionType.CALL)
+    assert hh.current_street == Street.FLOP
+    assert not bb.has_not_played_for_street(Street.PRE_FLOP)
+    assert bb.street_bet() == 0
+
+    hh.remove_last_action()
+    hh.remove_last_action()
+    assert sb.street_bet() == Decimal("0.5")
+    assert sb.invested_in_pot() == Decimal("0.6")
+    assert not sb.has_not_played_for_street(Street.PRE_FLOP)
+
+
+def test_side_pots_at_street_begin(new_hh):
+    hh = new_hh(stacks=(100, 100, 10))
+    hh.add_action(ActionType.RAISE, Decimal(9))
+    hh.add_action(ActionType.CALL)
+    hh.add_action(ActionType.CALL)
+    hh.add_action(ActionType.BET, Decimal(5))
+    assert hh.current_street == Street.FLOP
+    assert [p.amount for p in hh.side_pots(at_street_begin=True)] == [30]
+    assert hh.at_street_start().total_pot == 30
+
+    hh.add_action(ActionType.CALL)
+    assert hh.current_street == Street.TURN
+    assert [p.amount for p in hh.side_pots(at_street_begin=True)] == [30, 10]
+    assert hh.at_action(3).side_pots(at_street_begin=True)[0].amount == 30
+
+    hh.remove_last_action()
+    assert hh.current_street == Street.FLOP
+    assert [p.amount for p in hh.side_pots(at_street_begin=True)] == [30]
+    assert [p.amount for p in hh.side_pots()] == [30, 5]
+
+
+def test_side_pots_bb_ante(new_hh):
+    hh = new_hh(stacks=(100, 100, 10), bb_ante=Decimal(1))
+    hh.add_action(ActionType.RAISE, Decimal(9))
+    hh.add_action(ActionType.RAISE, Decimal(20))
+    hh.add_action(ActionType.CALL)
+    side_pots = hh.side_pots()
+    assert [p.amount for p in side_pots] == [31, 40]
+    assert sum(p.amount for p in side_pots) == hh.total_pot
+    assert [p.position for p in side_pots[1].players] == [Position.SB, Position.BB]
+
+    # all-in for the ante
+    hh = new_hh(stacks=(100, 1, 100), bb_ante=Decimal(1))
+    hh.add_action(ActionType.CALL)
+    hh.add_action(ActionType.CHECK)
+    side_pots = hh.side_pots()
+    assert [p.amount for p in side_pots] == [hh.total_pot] == [3]
+    # contesting the main pot, with nothing but the ante in it
+    bb = side_pots[0].players[0]
+    assert (bb.position, bb.investment) == (Position.BB, 0)
+
+
+def test_side_pots_dead_money(new_hh):
+    hh = new_hh(stacks=(100, 100, 5, 100))
+    hh.add_action(ActionType.RAISE, Decimal(4))
+    hh.add_action(ActionType.RAISE, Decimal(10))
+    hh.add_action(ActionType.FOLD)
+    hh.add_action(ActionType.FOLD)
+    side_pots = hh.side_pots()
+    assert [p.amount for p in side_pots] == [Decimal("11.5"), Decimal("10")]
+    assert [p.position for p in side_pots[0].folded] == [Position.SB, Position.BB]
+    assert side_pots[1].folded == []
+
+
+def test_fixed_point(new_hh):
+    decimal_hh = new_hh(stacks=(100, "12.34", 100), ante=Decimal("0.1"))
+    fixed_hh = new_hh(
+        stacks=(100, "12.34", 100), ante=Decimal("0.1"), fixed_point_decimals=2
+    )
+    for hh in decimal_hh, fixed_hh:
+        hh.add_action(ActionType.RAISE, hh.from_decimal(Decimal("2.5")))
+        hh.add_action(ActionType.RAISE, hh.from_decimal(Decimal("12.14")))
+        hh.add_action(ActionType.CALL)
+        hh.add_action(ActionType.CALL)
+    assert isinstance(fixed_hh.total_pot, int)
+    assert fixed_hh.to_decimal(fixed_hh.total_pot) == decimal_hh.total_pot
+    assert [fixed_hh.to_decimal(p.amount) for p in fixed_hh.side_pots()] == [
+        p.amount for p in decimal_hh.side_pots()
+    ]
+    assert decimal_hh.to_dict() == fixed_hh.to_dict()
+
+    reloaded = HandHistory.from_dict(decimal_hh.to_dict(), fixed_point=True)
+    assert reloaded.fixed_point.n_decimals == 2
+    assert reloaded.to_dict() == decimal_hh.to_dict()
+
+    with pytest.raises(InvalidAmount):
+        fixed_hh.from_decimal(Decimal("0.005"))
+
+
+def test_from_dict_trusted(new_hh):
+    hh = new_hh(stacks=(100, 100, 100))
+    hh.add_action(ActionType.RAISE, Decimal(2))
+    hh.add_action(ActionType.CALL)
+    hh.add_action(ActionType.FOLD)
+    hh.add_action(ActionType.BET, Decimal(5))
+    obj = hh.to_dict()
+
+    trusted = HandHistory.from_dict(obj, trusted=True)
+    assert trusted.to_dict() == obj
+    assert trusted.current_player.position == Position.BTN
+    trusted.validate()
+
+    obj["actions"][-1]["amount"] = Decimal("0.5")  # bet smaller than the BB
+    trusted = HandHistory.from_dict(obj, trusted=True)
+    assert trusted.total_pot == Decimal("7.5")
+    with pytest.raises(InvalidAmount):
+        trusted.validate()
+
+
+def test_legal_actions(new_hh):
+    hh = new_hh(stacks=(100, 100, 100, 30))
+    hh.add_action(ActionType.RAISE, Decimal(2))
+    legal = hh.legal_actions()
+    assert legal is hh.legal_actions()
+    assert legal.action_types == (ActionType.FOLD, ActionType.CALL, ActionType.RAISE)
+    assert legal.amount_to_call == 3
+    assert legal.min_raise == 2
+    assert legal.max_raise == 27
+    assert legal.min_bet is None
+    assert legal.pot == Decimal("4.5")
+
+    hh.add_action(ActionType.RAISE, Decimal(10))
+    legal = hh.legal_actions()
+    assert hh.current_player.position == Position.SB
+    assert legal.street_bet == Decimal("0.5")
+    assert legal.amount_to_call == Decimal("12.5")
+    assert legal.min_raise == 10
+
+    hh.remove_last_action()
+    assert hh.legal_actions().amount_to_call == 3
@@ -0,0 +1,13 @@
+from hh_creator.render_profile import FrameTimer
+
+
+def test_frame_timer_stats():
+    timer = FrameTimer("test")
+    assert timer.stats() is None
+    for ms in range(1, 101):
+        timer.add(ms)
+    stats = timer.stats()
+    assert stats["frames"] == 100
+    assert stats["mean"] == 50.5
+    assert stats["p95"] == 95
+    assert stats["max"] == 100
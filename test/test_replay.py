@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+from hh_creator.core.hh import ActionType, Street
+from hh_creator.core.replay import Step, compile_replay, precompile_replay
+
+
+def test_compile_replay(new_hh):
+    hh = new_hh()
+    hh.add_action(ActionType.RAISE, Decimal(2))
+    hh.add_action(ActionType.CALL)
+    hh.add_action(ActionType.FOLD)
+    hh.add_action(ActionType.CALL)
+    hh.add_action(ActionType.BET, Decimal(5))
+    hh.add_action(ActionType.FOLD)
+    hh.add_action(ActionType.FOLD)
+
+    frames = compile_replay(hh)
+    assert [f.steps for f in frames] == [
+        (),
+        (Step.SYNC,),
+        (Step.SYNC,),
+        (Step.SYNC,),
+        (Step.SYNC,),
+        (Step.SYNC,),
+        (Step.SHOW_FLOP,),
+        (Step.SYNC,),
+        (Step.SYNC,),
+        (Step.SYNC,),
+        (Step.COLLECT_BETS, Step.SHOW_TURN),
+        (Step.SHOW_RIVER,),
+        (Step.SHOW_HANDS,),
+        (Step.PAY_WINNERS,),
+    ]
+    assert frames[0].hand_history.actions == []
+    assert frames[5].hand_history is hh.at_action(4)
+    # the flop waits for Next
+    assert frames[5].board == Street.PRE_FLOP
+    assert frames[5].sound == "call_closing"
+    assert frames[6].board == Street.FLOP
+    assert frames[7].sound == ActionType.BET
+    assert frames[9].hand_history is hh
+    assert [f.board for f in frames[10:]] == [Street.TURN] + [Street.RIVER] * 3
+    assert [f.bets_collected for f in frames] == [False] * 10 + [True] * 4
+    assert [f.winners_paid for f in frames] == [False] * 13 + [True]
+
+
+def test_compile_replay_all_in(new_hh):
+    hh = new_hh(stacks=(10, 10, 10, 10))
+    hh.add_action(ActionType.RAISE, Decimal(9))
+    for _ in range(3):
+        hh.add_action(ActionType.CALL)
+
+    frames = compile_replay(hh)
+    # all-in before the flop: the board is dealt after the bets are collected
+    assert frames[-5].steps == (Step.COLLECT_BETS, Step.SHOW_FLOP)
+    assert [f.board for f in frames[-5:]] == [
+        Street.FLOP,
+        Street.TURN,
+        Street.RIVER,
+        Street.RIVER,
+        Street.RIVER,
+    ]
+
+
+def test_frame_values(new_hh):
+    hh = new_hh()
+    hh.add_action(ActionType.RAISE, Decimal(2))
+    hh.add_action(ActionType.FOLD)
+    hh.add_action(ActionType.CALL)
+
+    frames = compile_replay(hh)
+    values = frames[3].values
+    # the blinds are bets until collected
+    assert values.pots == (0,)
+    assert values.current_player == hh.at_action(2).current_player.position
+    seats = list(values.seats.values())
+    assert [s.bet for s in seats] == [Decimal("0.5"), Decimal(1), Decimal(3), 0]
+    assert [s.folded for s in seats] == [False, False, False, True]
+
+    # the bets are in the pot once collected
+    hh.add_action(ActionType.CALL)
+    values = compile_replay(hh)[-1].values
+    assert sum(values.pots) == hh.total_pot == Decimal(9)
+    assert all(s.bet == 0 for s in values.seats.values())
+
+
+def test_precompile_replay(new_hh):
+    hh = new_hh(stacks=(10, 10, 10, 10))
+    hh.add_action(ActionType.RAISE, Decimal(9))
+    for _ in range(3):
+        hh.add_action(ActionType.CALL)
+    sb, bb, utg, btn = (p.position for p in hh.players)
+    hands = {sb: ["Ks", "Kd"], bb: ["Qs", "Qd"], utg: ["Js", "Jd"], btn: ["As", "Ad"]}
+    board = ["2c", "3c", "4d", "9h", "Th"]
+
+    frames = precompile_replay(hh.to_dict(), hands, board)
+    # a copy of the hand
+    assert frames[-1].hand_history is not hh
+    assert frames[-1].hand_history.total_pot == hh.total_pot
+    assert frames[-1].winners == ((btn,),)
+    assert frames[-2].winners is None
+
+    # no showdown without the cards
+    hands[btn] = ["xx", "xx"]
+    assert precompile_replay(hh.to_dict(), hands, board)[-1].winners == (None,)
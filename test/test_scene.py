@@ -0,0 +1,94 @@
+import pytest
+from PyQt5 import QtGui
+
+from hh_creator import config
+
+
+@pytest.fixture
+def layered_scene(table_scene, monkeypatch):
+    """The table scene painting a static layer, counting the layers painted."""
+    for option in ("table", "webcam"):
+        # restored after the test
+        monkeypatch.setitem(
+            config.config["look"], option, config.config["look"][option]
+        )
+    table_scene.set_static_layer(True)
+    table_scene.painted = []
+    paint_layer = table_scene._paint_layer
+
+    def counted_paint_layer(key, hints, items, below=None):
+        table_scene.painted.append("seats" if below is not None else "table")
+        return paint_layer(key, hints, items, below)
+
+    monkeypatch.setattr(table_scene, "_paint_layer", counted_paint_layer)
+    return table_scene
+
+
+def render(scene, width=480):
+    rect = scene.sceneRect()
+    image = QtGui.QImage(
+        width, round(width * rect.height() / rect.width()), QtGui.QImage.Format_ARGB32
+    )
+    image.fill(0)
+    painter = QtGui.QPainter(image)
+    scene.render(painter)
+    painter.end()
+    return image
+
+
+def cache_keys(layers):
+    return [layer.cacheKey() for layer in layers.values()]
+
+
+def test_cached_layers(layered_scene):
+    scene = layered_scene
+    image = render(scene)
+    assert scene.painted == ["table", "seats"]
+    layers = cache_keys(scene._static_layers)
+    assert render(scene) == image
+    assert scene.painted == ["table", "seats"]
+    assert cache_keys(scene._static_layers) == layers
+
+    # another scale
+    render(scene, 320)
+    assert scene.painted == ["table", "seats"] * 2
+    assert len(scene._static_layers) == len(scene._table_layers) == 2
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda scene: scene.change_table("green"),
+        lambda scene: scene.change_background("red-plain"),
+    ],
+)
+def test_table_changes(layered_scene, change):
+    scene = layered_scene
+    image = render(scene)
+    change(scene)
+    assert not scene._static_layers and not scene._table_layers
+    assert render(scene) != image
+    assert scene.painted == ["table", "seats"] * 2
+
+
+def test_seat_changes(layered_scene):
+    scene = layered_scene
+    render(scene)
+    player = scene.player_items[1]
+    player.active = False
+    assert not scene._static_layers and scene._table_layers
+    render(scene)
+    assert scene.painted == ["table", "seats", "seats"]
+
+
+def test_highlight_changes(layered_scene):
+    scene = layered_scene
+    positions = [p.position for p in scene.parent().hand_history.players]
+    scene.highlight_player(positions[0])
+    render(scene)
+    scene.highlight_player(positions[0])
+    assert scene._static_layers
+    scene.highlight_player(positions[1])
+    assert not scene._static_layers and scene._table_layers
+    render(scene)
+    assert scene.painted == ["table", "seats", "seats"]
@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+from hh_creator.core.hh import Position
+from hh_creator.core.replay import compile_replay
+from hh_creator.scene_state import frame_state
+
+
+def seek(scene, frame, hide_hands=True):
+    return frame_state(scene, frame, hide_hands).apply(scene)
+
+
+def shown(cards):
+    return [card.isVisibleTo(card.parentItem()) for card in cards]
+
+
+def faces(player):
+    return [not card.back.isVisibleTo(card) for card in player.card_items[:2]]
+
+
+def test_seek(table_scene):
+    scene = table_scene
+    frames = compile_replay(scene.parent().hand_history)
+    players = {p.hh_position: p for p in scene.active_players()}
+    sb, bb, btn = players[Position.SB], players[Position.BB], players[Position.BTN]
+    # the hero
+    assert btn is next(scene.active_players())
+
+    # the bet on the flop, while the last action is displayed
+    sb.stack_item.action = "Bet"
+    assert seek(scene, frames[7]) > 0
+    assert (sb.bet_item.content, sb.stack_item.stack_item.content) == (5, 92)
+    assert bb.bet_item.content == 0
+    assert scene.central_pot_item.content == 9
+    assert shown(scene.board) == [True] * 3 + [False] * 2
+    assert shown(btn.card_items[:2]) == [False, False]
+    assert shown(sb.card_items[:2]) == [True, True]
+    assert faces(sb) == [False, False]
+    assert not sb.stack_item.timer.isActive()
+    assert sb.stack_item.stack_item.isVisible()
+    assert not sb.stack_item.action_item.isVisible()
+    # set at once
+    assert scene.animations.n_live() == 0
+    assert scene.animations.clock.is_idle()
+    assert seek(scene, frames[7]) == 0
+
+    # back before the fold of the button
+    seek(scene, frames[2])
+    bets = [p.bet_item.content for p in (sb, bb, players[Position.UTG])]
+    assert bets == [Decimal("0.5"), 1, 3]
+    assert scene.central_pot_item.content == 0
+    assert shown(scene.board) == [False] * 5
+    assert shown(btn.card_items[:2]) == [True, True]
+    assert seek(scene, frames[2]) == 0
+
+    # the hands shown, the bets collected
+    seek(scene, frames[-2])
+    assert sb.bet_item.content == 0
+    assert shown(scene.board) == [True] * 5
+    assert faces(sb) == faces(bb) == [True, True]
+    assert seek(scene, frames[-2]) == 0
+    assert scene.animations.n_live() == 0
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+import pytest
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from hh_creator.shadow import ShadowItem
+
+
+@pytest.fixture
+def bakes(monkeypatch):
+    """The number of pixmaps baked, with an empty cache."""
+    monkeypatch.setattr(ShadowItem, "_pixmaps", OrderedDict())
+    bakes = []
+    bake = ShadowItem._bake
+
+    def counted_bake(self, layers):
+        bakes.append(self.color.name())
+        return bake(self, layers)
+
+    monkeypatch.setattr(ShadowItem, "_bake", counted_bake)
+    return bakes
+
+
+def new_rect():
+    item = QtWidgets.QGraphicsRectItem(0, 0, 40, 20)
+    item.setBrush(QtGui.QBrush(QtCore.Qt.white))
+    return item
+
+
+def test_cached_pixmaps(bakes):
+    first = ShadowItem("black", 10)
+    first.cast([new_rect()])
+    # the same items elsewhere
+    moved = new_rect()
+    moved.setPos(100, 50)
+    second = ShadowItem("black", 10)
+    second.cast([moved])
+    assert len(bakes) == 1
+    assert second.pixmap().cacheKey() == first.pixmap().cacheKey()
+    assert second.pos() == QtCore.QPointF(100, 50)
+
+    ShadowItem("red", 10).cast([new_rect()])
+    rotated = new_rect()
+    rotated.setRotation(30)
+    ShadowItem("black", 10).cast([rotated])
+    assert len(bakes) == 3
+
+
+def test_cache_size(bakes, monkeypatch):
+    monkeypatch.setattr(ShadowItem, "MAX_CACHED", 2)
+    for color in ("black", "red", "blue"):
+        ShadowItem(color, 10).cast([new_rect()])
+    assert len(ShadowItem._pixmaps) == 2
+    # the least recently used went first
+    ShadowItem("red", 10).cast([new_rect()])
+    ShadowItem("black", 10).cast([new_rect()])
+    assert bakes == ["#000000", "#ff0000", "#0000ff", "#000000"]
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+from decimal import Decimal
+
+import pytest
+from PyQt5 import QtWidgets
+
+from hh_creator.text import TextItem
+
+
+@pytest.fixture
+def sizes(monkeypatch):
+    monkeypatch.setattr(TextItem, "_sizes", OrderedDict())
+    return TextItem._sizes
+
+
+def measured(item, text):
+    """The size of the bounding rect of item showing text, not cached."""
+    other = QtWidgets.QGraphicsTextItem()
+    other.setFont(item.font())
+    other.setPlainText(text)
+    return other.boundingRect().size()
+
+
+def test_text_size(sizes):
+    item = TextItem(point_size=20)
+    small = TextItem(point_size=10)
+    for text in ("", "1", "12.5 €", "12.5 €", "Relance"):
+        assert item.text_size(text) == measured(item, text)
+        assert small.text_size(text) == measured(small, text)
+    assert len(sizes) == 8
+
+
+def test_lru(sizes, monkeypatch):
+    monkeypatch.setattr(TextItem, "MAX_MEASURED", 2)
+    item = TextItem()
+    for text in ("a", "b", "a", "c"):
+        item.text_size(text)
+    assert [text for _, text in sizes] == ["a", "c"]
+
+
+def test_pos_if_content(sizes):
+    scene = QtWidgets.QGraphicsScene()
+    pot = TextItem(content_is_number=True, currency="€", point_size=30)
+    scene.addItem(pot)
+    pot.set_center(200, 100)
+    for content in (Decimal("12.5"), Decimal(1000), Decimal("0.5")):
+        moving = TextItem(content_is_number=True, currency="€", point_size=30)
+        scene.addItem(moving)
+        moving.content = content
+        moving.set_center(pot.sceneBoundingRect().center(), scene=True)
+        pos = pot.get_pos_if_content(content)
+        assert pos.x() == pytest.approx(moving.scenePos().x())
+        assert pos.y() == pytest.approx(moving.scenePos().y())
@@ -1,11 +1,81 @@
-from decimal import Decimal
+from collections import OrderedDict
 
-import hh_creator.util as ut
+import pytest
+from PyQt5 import QtCore, QtGui
 
+from hh_creator.util import Image
 
-def test_format_amount():
-    assert ut.amount_format(Decimal("1.325"), 3) == "1.325"
-    assert ut.amount_format(2, 3) == "2"
-    assert ut.amount_format(Decimal(0.5), 3) == "0.5"
-    assert ut.amount_format(Decimal("0.500"), 3) == "0.5"
-    assert ut.amount_format(Decimal("100")) == "100"  # not 1E+2BB
+# decoded as 10x10 pixels of 4 bytes
+N_BYTES = 400
+
+
+@pytest.fixture
+def images(tmp_path, monkeypatch):
+    """An empty cache of the PNG images a to d and the SVG image e."""
+    monkeypatch.setattr(Image, "IMG_PATH", tmp_path)
+    monkeypatch.setattr(Image, "_renderers", {})
+    monkeypatch.setattr(Image, "_pixmaps", OrderedDict())
+    monkeypatch.setattr(Image, "_pixmap_bytes", 0)
+    monkeypatch.setattr(Image, "_prefetched", {})
+    monkeypatch.setattr(Image, "_prefetched_bytes", OrderedDict())
+    monkeypatch.setattr(Image, "hits", 0)
+    monkeypatch.setattr(Image, "misses", 0)
+    for name in "abcd":
+        image = QtGui.QImage(10, 10, QtGui.QImage.Format_ARGB32)
+        image.fill(QtCore.Qt.red)
+        image.save(str(tmp_path / f"{name}.png"))
+    (tmp_path / "e.svg").write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10">'
+        '<rect width="10" height="10"/></svg>'
+    )
+    return tmp_path
+
+
+def test_pixmaps_lru(images, monkeypatch):
+    monkeypatch.setattr(Image, "max_pixmap_bytes", 2 * N_BYTES)
+    a = Image.pixmap("a")
+    Image.pixmap("b")
+    assert Image.pixmap("a").cacheKey() == a.cacheKey()
+    Image.pixmap("c")
+    assert list(Image._pixmaps) == [images / "a.png", images / "c.png"]
+    info = Image.cache_info()
+    assert (info["hits"], info["misses"]) == (1, 3)
+    assert info["pixmap_bytes"] == 2 * N_BYTES
+
+    with pytest.raises(FileNotFoundError):
+        Image.pixmap("missing")
+
+
+def test_invalidate(images):
+    a = Image.pixmap("a")
+    Image.pixmap("b")
+    renderer = Image.renderer("e")
+    Image.invalidate("a", "e")
+    assert list(Image._pixmaps) == [images / "b.png"]
+    assert Image.cache_info()["pixmap_bytes"] == N_BYTES
+    assert Image.pixmap("a").cacheKey() != a.cacheKey()
+    assert Image.renderer("e") is not renderer
+
+    Image.invalidate()
+    assert Image.cache_info()["size"] == Image.cache_info()["pixmaps"] == 0
+    assert Image.cache_info()["pixmap_bytes"] == 0
+
+
+def test_prefetch(images, monkeypatch):
+    monkeypatch.setattr(Image, "max_pixmap_bytes", 2 * N_BYTES)
+    Image.prefetch("a", "e", "missing")
+    assert set(Image._prefetched) == {images / "a.png", images / "e.svg"}
+    assert Image.cache_info()["prefetched_bytes"] == N_BYTES
+    Image.pixmap("a")
+    Image.renderer("e")
+    info = Image.cache_info()
+    assert (info["prefetched"], info["prefetched_bytes"]) == (0, 0)
+    assert (info["pixmaps"], info["size"]) == (1, 1)
+
+    # counted in the budget
+    Image.prefetch("b", "c")
+    assert list(Image._prefetched) == [images / "b.png"]
+    # evicted before the pixmaps asked for
+    Image.pixmap("d")
+    assert not Image._prefetched
+    assert list(Image._pixmaps) == [images / "a.png", images / "d.png"]